@@ -0,0 +1,16 @@
+"""
+Benchmarks of the dhtioc computations.
+
+Run each module from the top of the source tree, such as::
+
+    python -m benchmarks.bench_trend
+
+Each module provides ``BENCHMARKS``, a dictionary of
+``{description: factory}``.  Each factory prepares
+its benchmark and returns a function that performs
+one iteration of it.
+
+Run them all, and record the results, with::
+
+    python -m benchmarks.run
+"""
@@ -0,0 +1,124 @@
+"""
+Speed of reading data files, up to a year of them.
+
+A day of readings (one every 2 s) is written in a temporary
+directory (in ``$DHTIOC_BENCH_DISK``, default: the current
+directory) and linked as every day of a year.  The files are then
+read from the page cache: the benchmarks measure parsing, not the
+storage.
+"""
+
+import atexit
+import datetime
+import numpy as np
+import os
+import shutil
+import tempfile
+
+from dhtioc.datalogger import DataLogger, read_file
+
+from .timing import report
+
+DAY = 43200  # readings, one every 2 s
+FIRST_DAY = datetime.date(2020, 1, 1)
+
+
+def _year():
+    """DataLogger with a year of (identical) data files."""
+    path = tempfile.mkdtemp(
+        prefix="dhtioc_bench_",
+        dir=os.environ.get("DHTIOC_BENCH_DISK", os.getcwd()),
+    )
+    atexit.register(shutil.rmtree, path, True)
+    logger = DataLogger("bench:", path=path)
+
+    t0 = datetime.datetime(FIRST_DAY.year, 1, 1).timestamp()
+    rng = np.random.default_rng(42)
+    rows = zip(
+        t0 + 2.0 * np.arange(DAY),
+        50 + rng.normal(0, 5, DAY),
+        20 + rng.normal(0, 2, DAY),
+    )
+    first = logger.get_daily_file(datetime.datetime(2020, 1, 1))
+    logger.create_file(first)
+    with open(first, "a") as f:
+        f.write("".join(f"{t:.02f} {rh:.01f} {c:.01f}\n" for t, rh, c in rows))
+
+    for day in range(1, 365):
+        dt = datetime.datetime(2020, 1, 1) + datetime.timedelta(days=day)
+        fname = logger.get_daily_file(dt)
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        os.link(first, fname)
+    return logger
+
+
+_logger = None
+
+
+def _data():
+    """The DataLogger with a year of data files (made once)."""
+    global _logger
+    if _logger is None:
+        _logger = _year()
+    return _logger
+
+
+def read_day():
+    """read_file() of one day."""
+    fname = _data().get_daily_file(datetime.datetime(2020, 1, 1))
+    return lambda: read_file(fname)
+
+
+def loadtxt_day():
+    """numpy.loadtxt() of one day, for reference."""
+    fname = _data().get_daily_file(datetime.datetime(2020, 1, 1))
+    return lambda: np.loadtxt(fname, comments="#", ndmin=2)
+
+
+def _load(days, workers=None):
+    logger = _data()
+    end = FIRST_DAY + datetime.timedelta(days=days - 1)
+    if workers is None:
+        return lambda: logger.load(FIRST_DAY, end)
+    return lambda: logger.load(FIRST_DAY, end, workers=workers)
+
+
+def load_week():
+    """DataLogger.load() of 7 days."""
+    return _load(7)
+
+
+def load_year():
+    """DataLogger.load() of 365 days."""
+    return _load(365)
+
+
+def load_year_serial():
+    """DataLogger.load() of 365 days, one file at a time."""
+    return _load(365, workers=1)
+
+
+BENCHMARKS = {}
+
+BULK_BENCHMARKS = {
+    "read_file (1 day)": read_day,
+    "numpy.loadtxt (1 day)": loadtxt_day,
+    "DataLogger.load (1 week)": load_week,
+}
+
+YEAR_BENCHMARKS = {
+    "DataLogger.load (1 year, 1 thread)": load_year_serial,
+    "DataLogger.load (1 year)": load_year,
+}
+
+
+def main():
+    """Print the time to read a day, a week, and a year of data files."""
+    report(BULK_BENCHMARKS, number=10)
+    times = report(YEAR_BENCHMARKS, number=1, repeat=3)
+    for name, t in times.items():
+        print(f"{name}: {365 * DAY / t / 1e6:.1f} M readings / s")
+
+
+if __name__ == "__main__":
+    main()
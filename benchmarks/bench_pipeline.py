@@ -0,0 +1,148 @@
+"""
+Cost of each stage from sensor reading to PVs and data file
+(or SQLite database).
+
+The readings come from a :class:`~dhtioc.simulator.SimulatedSensor`.
+Data files are written on tmpfs (``/dev/shm``, when present) and
+on disk (a temporary directory in ``$DHTIOC_BENCH_DISK``, default:
+the current directory), to separate the cost of formatting from
+the cost of the storage.
+"""
+
+import asyncio
+import atexit
+import os
+import shutil
+import tempfile
+import time
+
+from dhtioc.datalogger import DataLogger, SQLiteDataLogger
+from dhtioc.simulator import SimulatedSensor
+from dhtioc.trend_analysis import SMOOTHING_FACTOR
+from dhtioc.utils import smooth
+
+from .timing import per_call, report
+
+TMPFS = "/dev/shm"
+
+
+def _sensor():
+    """Simulated sensor, read on demand, with the first reading made."""
+    sensor = SimulatedSensor(seed=42, background=False)
+    sensor.read()
+    return sensor
+
+
+def _scratch(parent):
+    """Temporary directory under ``parent``, removed at exit."""
+    path = tempfile.mkdtemp(prefix="dhtioc_bench_", dir=parent)
+    atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def smooth_reading():
+    """smooth() one reading."""
+    previous = 50.0
+    return lambda: smooth(50.1, SMOOTHING_FACTOR, previous)
+
+
+def sensor_read():
+    """SimulatedSensor.read(), the source of the other benchmarks."""
+    return _sensor().read
+
+
+def _record(parent, **kwargs):
+    logger = DataLogger("bench:", path=_scratch(parent), **kwargs)
+    sensor = _sensor()
+    logger.record(sensor.humidity, sensor.temperature)  # create the file
+    return lambda: logger.record(sensor.humidity, sensor.temperature)
+
+
+def record_tmpfs():
+    """DataLogger.record() to a file on tmpfs."""
+    return _record(TMPFS)
+
+
+def record_disk():
+    """DataLogger.record() to a file on disk."""
+    return _record(os.environ.get("DHTIOC_BENCH_DISK", os.getcwd()))
+
+
+def record_disk_fsync():
+    """DataLogger.record() to a file on disk, fsync each record."""
+    return _record(
+        os.environ.get("DHTIOC_BENCH_DISK", os.getcwd()), durability="batch"
+    )
+
+
+def record_sqlite():
+    """SQLiteDataLogger.record() to a database on disk, in batches."""
+    path = _scratch(os.environ.get("DHTIOC_BENCH_DISK", os.getcwd()))
+    logger = SQLiteDataLogger("bench:", path=path)
+    atexit.register(logger.close)
+    sensor = _sensor()
+    return lambda: logger.record(sensor.humidity, sensor.temperature)
+
+
+def ioc_cycle():
+    """One DHT_IOC update cycle: new reading, PVs, alarm, health, log."""
+    from dhtioc.ioc import DHT_IOC
+
+    sensor = _sensor()
+    ioc = DHT_IOC(
+        prefix="bench:",
+        sensor=sensor,
+        report_period=2.0,
+        log_path=_scratch(None),
+    )
+    loop = asyncio.new_event_loop()
+    atexit.register(loop.close)
+
+    async def cycle():
+        sensor.read()
+        await ioc.update_alarm()
+        await ioc.update()
+        await ioc.update_health()
+
+    return lambda: loop.run_until_complete(cycle())
+
+
+BENCHMARKS = {
+    "smooth": smooth_reading,
+    "SimulatedSensor.read": sensor_read,
+    "DataLogger.record (disk)": record_disk,
+    "DataLogger.record (disk, fsync)": record_disk_fsync,
+    "DataLogger.record (SQLite, disk)": record_sqlite,
+    "DHT_IOC update cycle": ioc_cycle,
+}
+if os.path.isdir(TMPFS):
+    BENCHMARKS["DataLogger.record (tmpfs)"] = record_tmpfs
+
+
+def latency(func, number=2000):
+    """Median and 99th percentile time (s) of single calls of ``func()``."""
+    times = []
+    for _ in range(number):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[number // 2], times[int(number * 0.99)]
+
+
+def main():
+    """Print the cost of each stage, and the DataLogger latency."""
+    report(BENCHMARKS, number=1000)
+    for name in BENCHMARKS:
+        if name.startswith("DataLogger.record"):
+            median, p99 = latency(BENCHMARKS[name]())
+            print(
+                f"{name} latency: median {median*1e6:.1f} us,"
+                f" 99% {p99*1e6:.1f} us"
+            )
+    throughput = 1 / per_call(record_disk(), number=1000)
+    print(f"DataLogger.record (disk) throughput: {throughput:.0f} / s")
+
+
+if __name__ == "__main__":
+    main()
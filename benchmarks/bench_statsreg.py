@@ -0,0 +1,119 @@
+"""
+Throughput of the ``StatsRegClass`` operations.
+
+Each benchmark is one call, timed with registers holding
+a few hundred pairs.
+"""
+
+import numpy as np
+import random
+
+from dhtioc.StatsReg import StatsRegClass
+
+from .timing import report
+
+
+def _loaded(n=300, seed=42):
+    """Registers loaded with ``n`` pairs, and the pairs."""
+    rng = random.Random(seed)
+    pairs = [(i, 50 + rng.gauss(0, 1)) for i in range(n)]
+    reg = StatsRegClass()
+    for x, y in pairs:
+        reg.Add(x, y)
+    return reg, pairs
+
+
+def add():
+    """Add() one pair."""
+    reg, _ = _loaded()
+    return lambda: reg.Add(3.0, 50.1)
+
+
+def add_weighted():
+    """AddWeighted() one pair."""
+    reg, _ = _loaded()
+    return lambda: reg.AddWeighted(3.0, 50.1, 0.5)
+
+
+def add_subtract():
+    """Add() then Subtract() one pair."""
+    reg, _ = _loaded()
+
+    def step():
+        reg.Add(3.0, 50.1)
+        reg.Subtract(3.0, 50.1)
+
+    return step
+
+
+def add_regression():
+    """Add() one pair, then LinearRegression()."""
+    reg, _ = _loaded()
+
+    def step():
+        reg.Add(3.0, 50.1)
+        return reg.LinearRegression()
+
+    return step
+
+
+def regression_cached():
+    """LinearRegression() with no change to the registers."""
+    reg, _ = _loaded()
+    reg.LinearRegression()
+    return reg.LinearRegression
+
+
+DAY = 43200  # samples in a day, every 2 s
+
+
+def add_day_loop():
+    """Add() a day of pairs, one at a time."""
+    x = np.arange(DAY, dtype=float)
+    y = np.random.default_rng(42).normal(50, 1, DAY)
+    pairs = list(zip(x.tolist(), y.tolist()))
+
+    def step():
+        reg = StatsRegClass()
+        for xi, yi in pairs:
+            reg.Add(xi, yi)
+        return reg.LinearRegression()
+
+    return step
+
+
+def add_day_arrays():
+    """AddArrays() a day of pairs."""
+    x = np.arange(DAY, dtype=float)
+    y = np.random.default_rng(42).normal(50, 1, DAY)
+
+    def step():
+        reg = StatsRegClass()
+        reg.AddArrays(x, y)
+        return reg.LinearRegression()
+
+    return step
+
+
+BENCHMARKS = {
+    "StatsRegClass.Add": add,
+    "StatsRegClass.AddWeighted": add_weighted,
+    "StatsRegClass.Add + Subtract": add_subtract,
+    "StatsRegClass.Add + LinearRegression": add_regression,
+    "StatsRegClass.LinearRegression (cached)": regression_cached,
+}
+
+BULK_BENCHMARKS = {
+    f"StatsRegClass: {DAY} x Add + LinearRegression": add_day_loop,
+    f"StatsRegClass: AddArrays({DAY}) + LinearRegression": add_day_arrays,
+}
+
+
+def main():
+    """Print the cost of each operation."""
+    report(BENCHMARKS, number=100000)
+    report(BULK_BENCHMARKS, number=10)
+
+
+if __name__ == "__main__":
+    main()
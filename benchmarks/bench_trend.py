@@ -0,0 +1,126 @@
+"""
+Per-sample cost of the trend computation.
+
+Compares ``Trend`` (precomputed slope weights) with the earlier
+implementation, which reloaded a ``StatsRegClass`` for every sample,
+and many ``Trend`` instances with one ``TrendBank``.
+"""
+
+import itertools
+import numpy as np
+import random
+
+from dhtioc.StatsReg import StatsRegClass
+from dhtioc.trend_analysis import TREND_SMOOTHING_FACTOR, Trend, TrendBank
+from dhtioc.utils import smooth
+
+from .timing import report
+
+
+class StatsRegTrend(Trend):
+    """``Trend`` as computed with ``StatsRegClass``, for comparison."""
+
+    def __init__(self):
+        super().__init__()
+        self.stats = StatsRegClass()
+
+    def compute(self, reading):
+        self.stats.Clear()
+        self._computed = False
+        for factor in self.cache.keys():
+            self.cache[factor] = smooth(reading, factor, self.cache[factor])
+            self.stats.Add(1 - factor, self.cache[factor])
+
+    @property
+    def slope(self):
+        if not self._computed and self.stats.count > 1:
+            raw = self.stats.LinearRegression()[-1]
+            self.trend = smooth(raw, TREND_SMOOTHING_FACTOR, self.trend)
+            self._computed = True
+        return self.trend
+
+
+def readings(n=1000, seed=42):
+    """Endless random walk of humidity-like values."""
+    rng = random.Random(seed)
+    values = [50.0]
+    for _ in range(n - 1):
+        values.append(values[-1] + rng.gauss(0, 0.2))
+    return itertools.cycle(values)
+
+
+def _trend_step(trend):
+    values = readings()
+
+    def step():
+        trend.compute(next(values))
+        return trend.slope
+
+    return step
+
+
+def trend_statsreg():
+    """One sample: compute() and slope, with StatsRegClass."""
+    return _trend_step(StatsRegTrend())
+
+
+def trend_weights():
+    """One sample: compute() and slope, with precomputed weights."""
+    return _trend_step(Trend())
+
+
+CHANNELS = 40
+
+
+def trend_many():
+    """One sample of CHANNELS channels, each with its own Trend."""
+    trends = [Trend() for _ in range(CHANNELS)]
+    values = readings()
+
+    def step():
+        value = next(values)
+        for trend in trends:
+            trend.compute(value)
+            trend.slope
+
+    return step
+
+
+def trend_bank():
+    """One sample of CHANNELS channels with a TrendBank."""
+    bank = TrendBank(CHANNELS)
+    values = readings()
+
+    def step():
+        bank.compute(np.full(CHANNELS, next(values)))
+        return bank.slope
+
+    return step
+
+
+BENCHMARKS = {
+    "Trend.compute + slope (StatsRegClass)": trend_statsreg,
+    "Trend.compute + slope (precomputed weights)": trend_weights,
+    f"{CHANNELS} x Trend.compute + slope": trend_many,
+    f"TrendBank({CHANNELS}).compute + slope": trend_bank,
+}
+
+
+def main():
+    """Print the per-sample cost of each implementation."""
+    ref, fast = StatsRegTrend(), Trend()
+    difference = 0
+    for value in itertools.islice(readings(), 1000):
+        ref.compute(value)
+        fast.compute(value)
+        difference = max(difference, abs(ref.slope - fast.slope))
+    print(f"largest difference in slope: {difference:.3g}")
+
+    results = report(BENCHMARKS, number=2000)
+    times = list(results.values())
+    print(f"speedup, precomputed weights: {times[0] / times[1]:.2f}x")
+    print(f"speedup, TrendBank: {times[2] / times[3]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Run all the benchmarks and record the results.
+
+From the top of the source tree::
+
+    python -m benchmarks.run
+    python -m benchmarks.run --compare benchmarks/results/1.1.1.json
+    python -m benchmarks.run --year
+
+With ``--year``, the benchmarks of a year of data (``YEAR_BENCHMARKS``,
+seconds each) are run too, once per timing.
+
+The results are written (as JSON) to ``benchmarks/results/``, in
+a file named for the installed version of dhtioc.  Keep the file
+from each release, then compare against it: benchmarks slower by
+more than ``--threshold`` are reported as regressions.
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import os
+import platform
+import sys
+
+from dhtioc import __version__
+
+from .timing import NUMBER, REPEAT, per_call
+
+MODULES = "bench_datafiles bench_pipeline bench_statsreg bench_trend".split()
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+THRESHOLD = 0.2  # fraction slower that counts as a regression
+
+
+def collect(modules=MODULES):
+    """Return ``{name: module}`` of each benchmark module."""
+    return {
+        name: importlib.import_module(f".{name}", __package__)
+        for name in modules
+    }
+
+
+def run(modules, number=NUMBER, repeat=REPEAT, year=False):
+    """Time each benchmark; return ``{"module: description": seconds}``."""
+    times = {}
+    for module, code in modules.items():
+        # the bulk benchmarks take milliseconds, so run them fewer times
+        bulk = getattr(code, "BULK_BENCHMARKS", {})
+        # and those of a year of data take seconds, so once
+        years = getattr(code, "YEAR_BENCHMARKS", {}) if year else {}
+        for name, factory in {**code.BENCHMARKS, **bulk, **years}.items():
+            key = f"{module}: {name}"
+            if name in years:
+                n = 1
+            elif name in bulk:
+                n = max(1, number // 1000)
+            else:
+                n = number
+            times[key] = per_call(factory(), number=n, repeat=repeat)
+            print(f"{times[key]*1e6:12.3f} us  {key}")
+    return times
+
+
+def compare(times, reference, threshold=THRESHOLD):
+    """Print the change from the ``reference`` results; return regressions."""
+    regressions = []
+    print(f"\nchange from version {reference['version']}:")
+    for key, t in times.items():
+        t_ref = reference["times"].get(key)
+        if t_ref is None:
+            print(f"{'new':>8}  {key}")
+            continue
+        change = t / t_ref - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{change:+8.1%}  {key}{flag}")
+    return regressions
+
+
+def main():
+    """Entry point for command-line program."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--number", type=int, default=NUMBER, help="calls per timing"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=REPEAT, help="timings per benchmark"
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="results file (default: results/VERSION.json)",
+    )
+    parser.add_argument(
+        "--compare", default=None, help="results file to compare against"
+    )
+    parser.add_argument(
+        "--year",
+        action="store_true",
+        help="also run the benchmarks of a year of data (slow)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="fraction slower that counts as a regression",
+    )
+    args = parser.parse_args()
+
+    times = run(
+        collect(), number=args.number, repeat=args.repeat, year=args.year
+    )
+    results = dict(
+        version=__version__,
+        date=datetime.datetime.now().isoformat(sep=" ", timespec="seconds"),
+        python=platform.python_version(),
+        machine=platform.machine(),
+        platform=platform.platform(),
+        number=args.number,
+        repeat=args.repeat,
+        year=args.year,
+        times=times,
+    )
+    output = args.output or os.path.join(RESULTS_DIR, f"{__version__}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            reference = json.load(f)
+        if compare(times, reference, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
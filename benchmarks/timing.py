@@ -0,0 +1,20 @@
+"""Timing support for the benchmarks."""
+
+import timeit
+
+NUMBER = 10000  # calls per timing
+REPEAT = 5  # timings, the best is reported
+
+
+def per_call(func, number=NUMBER, repeat=REPEAT):
+    """Return the best time (s) per call of ``func()``."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(benchmarks, number=NUMBER, repeat=REPEAT):
+    """Time and print each of the ``benchmarks``; return the times."""
+    results = {}
+    for name, factory in benchmarks.items():
+        results[name] = per_call(factory(), number=number, repeat=repeat)
+        print(f"{results[name]*1e6:10.3f} us  {name}")
+    return results
@@ -10,6 +10,13 @@ The available routines are::
      def Subtract(x, y):                 remove an X,Y pair
      def AddWeighted(x, y, z):           add an X,Y pair with weight Z
      def SubtractWeighted(x, y, z):      remove an X,Y pair with weight Z
+     def AddArrays(x, y):                add arrays of X,Y pairs
+     def AddWeightedArrays(x, y, z):     add arrays of X,Y pairs with weights Z
+     def merge(other):                   add the registers of another set
+     def combine(regs):                  (new) sum of several register sets
+     def to_array(), from_array(a):      registers as a list of 7 floats
+     def to_bytes(), from_bytes(b):      registers as compact bytes
+     def to_dict(), from_dict(d):        registers as a dictionary
      def Mean():                         arithmetic mean of X & Y
      def StdDev():                       standard deviation on X & Y
      def StdErr():                       standard error on X & Y
@@ -18,6 +25,8 @@ The available routines are::
      def LinearRegressionCorrelation():  the regression coefficient
      def CorrelationCoefficient():       relation of errors in slope & intercept
 
+For sliding windows over long runs, use :class:`WindowedRegression`.
+
 :see: http://stattrek.com/AP-Statistics-1/Regression.aspx?Tutorial=Stat
 
 pocket calculator Statistical Registers, Pete Jemian, 2003-Apr-18
@@ -27,16 +36,72 @@ Source code documentation
 """
 
 
+import collections
 import math
+import numpy as np
 import os
+import struct
 import sys
 
 
 version = "0.1a"
 
+# names of the registers, in their serialized order
+REGISTERS = "count weight sumX sumXX sumY sumYY sumXY".split()
+_BYTES_VERSION = 1
+_BYTES_FORMAT = struct.Struct("<Bq6d")  # version, count, other registers
+# results cached by StatsRegClass, None until computed
+_RESULTS = "slope intercept determ mean sDev sErr lrVariance r correlation"
+
+
+def _cached_result(name):
+    """Cached result attribute: ``None`` when the registers have changed."""
+    private = f"_{name}"
+
+    def fget(self):
+        return None if self._dirty else getattr(self, private)
+
+    def fset(self, value):
+        self._results()
+        setattr(self, private, value)
+
+    return property(fget, fset, doc=f"cached ``{name}``, or ``None``")
+
 
 class StatsRegClass:
-    """pocket calculator Statistical Registers class"""
+    """
+    pocket calculator Statistical Registers class
+
+    A compact class (``__slots__``).  Adding or removing
+    pairs only marks the cached results (such as ``slope``)
+    as out of date: they then read as ``None``, as before.
+    They are recomputed, as needed, by the method that
+    reports them.
+    """
+
+    __slots__ = (
+        # registers
+        "count",
+        "weight",
+        "sumX",
+        "sumXX",
+        "sumY",
+        "sumYY",
+        "sumXY",
+        # cached results, see the properties below
+        *[f"_{name}" for name in _RESULTS.split()],
+        "_dirty",
+    )
+
+    slope = _cached_result("slope")
+    intercept = _cached_result("intercept")
+    determ = _cached_result("determ")
+    mean = _cached_result("mean")
+    sDev = _cached_result("sDev")
+    sErr = _cached_result("sErr")
+    lrVariance = _cached_result("lrVariance")
+    r = _cached_result("r")
+    correlation = _cached_result("correlation")
 
     def __init__(self):
         """Set up the statistics registers."""
@@ -47,15 +112,21 @@ class StatsRegClass:
         Cache the results to avoid unnecessary recalculation.
         When requested, test for None before recalculating.
         """
-        self.slope = None
-        self.intercept = None
-        self.determ = None
-        self.mean = None
-        self.sDev = None
-        self.sErr = None
-        self.lrVariance = None
-        self.r = None
-        self.correlation = None
+        self._slope = None
+        self._intercept = None
+        self._determ = None
+        self._mean = None
+        self._sDev = None
+        self._sErr = None
+        self._lrVariance = None
+        self._r = None
+        self._correlation = None
+        self._dirty = False
+
+    def _results(self):
+        """Discard the cached results if the registers have changed."""
+        if self._dirty:
+            self._ClearResults_()
 
     def Clear(self):
         """
@@ -92,7 +163,16 @@ class StatsRegClass:
         :param float x: value to accumulate
         :param float y: value to accumulate
         """
-        return self.AddWeighted(x, y, 1)
+        # same as AddWeighted(x, y, 1), without the arithmetic of weight 1
+        self._dirty = True
+        self.count += 1
+        self.weight += 1.0
+        self.sumX += x
+        self.sumXX += x * x
+        self.sumY += y
+        self.sumYY += y * y
+        self.sumXY += x * y
+        return self.count
 
     def Subtract(self, x, y):
         """
@@ -101,7 +181,16 @@ class StatsRegClass:
         :param float x: value to remove
         :param float y: value to remove
         """
-        return self.SubtractWeighted(x, y, 1)
+        # same as SubtractWeighted(x, y, 1)
+        self._dirty = True
+        self.count -= 1
+        self.weight -= 1.0
+        self.sumX -= x
+        self.sumXX -= x * x
+        self.sumY -= y
+        self.sumYY -= y * y
+        self.sumXY -= x * y
+        return self.count
 
     def AddWeighted(self, x, y, z):
         """
@@ -111,17 +200,17 @@ class StatsRegClass:
         :param float y: value to accumulate
         :param float z: variance (weight = ``1/z^2``) of y
         """
-        self._ClearResults_()
+        self._dirty = True
         # TODO: verify handling of weight
-        weight = 1.0 / (z ** 2)
+        weight = 1.0 / (z * z)
         xWt = x * weight
         yWt = y * weight
         self.count += 1
         self.weight += weight
         self.sumX += xWt
-        self.sumXX += xWt ** 2
+        self.sumXX += xWt * xWt
         self.sumY += yWt
-        self.sumYY += yWt ** 2
+        self.sumYY += yWt * yWt
         self.sumXY += xWt * yWt
         return self.count
 
@@ -133,19 +222,177 @@ class StatsRegClass:
         :param float y: value to remove
         :param float z: variance (weight = ``1/z^2``) of y
         """
-        self._ClearResults_()
-        weight = 1.0 / (z ** 2)
+        self._dirty = True
+        weight = 1.0 / (z * z)
         xWt = x * weight
         yWt = y * weight
         self.count -= 1
         self.weight -= weight
         self.sumX -= xWt
-        self.sumXX -= xWt ** 2
+        self.sumXX -= xWt * xWt
         self.sumY -= yWt
-        self.sumYY -= yWt ** 2
+        self.sumYY -= yWt * yWt
         self.sumXY -= xWt * yWt
         return self.count
 
+    def AddArrays(self, x, y):
+        """
+        add arrays of X,Y pairs to the statistics registers
+
+        Same as calling :meth:`Add` for each pair, in one
+        vectorized reduction.
+
+        :param [float] x: values to accumulate
+        :param [float] y: values to accumulate
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape:
+            raise ValueError(
+                f"x and y differ in length: {len(x)} and {len(y)}"
+            )
+        self._dirty = True
+        self.count += len(x)
+        self.weight += float(len(x))
+        self.sumX += float(x.sum())
+        self.sumXX += float(x @ x)
+        self.sumY += float(y.sum())
+        self.sumYY += float(y @ y)
+        self.sumXY += float(x @ y)
+        return self.count
+
+    def AddWeightedArrays(self, x, y, z):
+        """
+        add arrays of weighted X,Y, +/- Z trios to the statistics registers
+
+        Same as calling :meth:`AddWeighted` for each trio, in one
+        vectorized reduction.
+
+        :param [float] x: values to accumulate
+        :param [float] y: values to accumulate
+        :param [float] z: variance (weight = ``1/z^2``) of each y,
+            or one variance for all
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape:
+            raise ValueError(
+                f"x and y differ in length: {len(x)} and {len(y)}"
+            )
+        # a single z applies to every pair
+        z = np.broadcast_to(np.asarray(z, dtype=float), x.shape)
+        weight = 1.0 / (z * z)
+        xWt = x * weight
+        yWt = y * weight
+        self._dirty = True
+        self.count += len(xWt)
+        self.weight += float(weight.sum())
+        self.sumX += float(xWt.sum())
+        self.sumXX += float(xWt @ xWt)
+        self.sumY += float(yWt.sum())
+        self.sumYY += float(yWt @ yWt)
+        self.sumXY += float(xWt @ yWt)
+        return self.count
+
+    def merge(self, other):
+        """
+        add the registers of ``other`` to these registers
+
+        The result is the same as if all the pairs added to
+        ``other`` had been added here.  Use this to combine
+        registers accumulated separately, such as from chunks
+        of data reduced in parallel.
+
+        :param StatsRegClass other: registers to add
+        :return: self
+        """
+        self._dirty = True
+        self.count += other.count
+        self.weight += other.weight
+        self.sumX += other.sumX
+        self.sumXX += other.sumXX
+        self.sumY += other.sumY
+        self.sumYY += other.sumYY
+        self.sumXY += other.sumXY
+        return self
+
+    @classmethod
+    def combine(cls, registers):
+        """
+        new statistics registers: the sum of several sets
+
+        Cost is proportional to the number of sets, not the
+        number of pairs they hold.
+
+        :param [StatsRegClass] registers: sets to combine
+        :rtype: StatsRegClass
+        """
+        result = cls()
+        for other in registers:
+            result.merge(other)
+        return result
+
+    def to_array(self):
+        """
+        registers as a list of floats, in the order of ``REGISTERS``
+
+        Suitable, for example, as the value of a waveform PV.
+        """
+        return [float(getattr(self, k)) for k in REGISTERS]
+
+    @classmethod
+    def from_array(cls, values):
+        """
+        new statistics registers from :meth:`to_array` content
+
+        :param [float] values: register values
+        :rtype: StatsRegClass
+        """
+        if len(values) != len(REGISTERS):
+            raise ValueError(
+                f"Expected {len(REGISTERS)} values, received {len(values)}"
+            )
+        reg = cls()
+        for k, v in zip(REGISTERS, values):
+            setattr(reg, k, float(v))
+        reg.count = int(reg.count)
+        return reg
+
+    def to_dict(self):
+        """registers as a dictionary, keyed by the names in ``REGISTERS``"""
+        return {k: getattr(self, k) for k in REGISTERS}
+
+    @classmethod
+    def from_dict(cls, registers):
+        """
+        new statistics registers from :meth:`to_dict` content
+
+        :param dict registers: register values
+        :rtype: StatsRegClass
+        """
+        return cls.from_array([registers[k] for k in REGISTERS])
+
+    def to_bytes(self):
+        """registers as compact bytes (57 bytes)"""
+        return _BYTES_FORMAT.pack(
+            _BYTES_VERSION,
+            self.count,
+            *[float(getattr(self, k)) for k in REGISTERS[1:]],
+        )
+
+    @classmethod
+    def from_bytes(cls, buffer):
+        """
+        new statistics registers from :meth:`to_bytes` content
+
+        :param bytes buffer: serialized registers
+        :rtype: StatsRegClass
+        """
+        version, *values = _BYTES_FORMAT.unpack(buffer)
+        if version != _BYTES_VERSION:
+            raise ValueError(f"Unknown serialization version {version}")
+        return cls.from_array(values)
+
     def Mean(self):
         """
 		arithmetic mean of X & Y
@@ -157,9 +404,10 @@ class StatsRegClass:
 		:return: mean X and Y values
 		:rtype: float
 		"""
-        if self.mean == None:
-            self.mean = (self.sumX / self.weight, self.sumY / self.weight)
-        return self.mean
+        self._results()
+        if self._mean is None:
+            self._mean = (self.sumX / self.weight, self.sumY / self.weight)
+        return self._mean
 
     def __sdeverr(self, summation, sqr, weight):
         """
@@ -182,11 +430,12 @@ class StatsRegClass:
 		:return: standard deviation of mean X and Y values
 		:rtype: (float, float)
 		"""
-        if self.sDev == None:
+        self._results()
+        if self._sDev is None:
             xDev = self.__sdeverr(self.sumX, self.sumXX, self.weight)[0]
             yDev = self.__sdeverr(self.sumY, self.sumYY, self.weight)[0]
-            self.sDev = (xDev, yDev)
-        return self.sDev
+            self._sDev = (xDev, yDev)
+        return self._sDev
 
     def StdErr(self):
         """
@@ -195,11 +444,12 @@ class StatsRegClass:
 		:return: standard error of mean X and Y values
 		:rtype: (float, float)
 		"""
-        if self.sErr == None:
+        self._results()
+        if self._sErr is None:
             xErr = self.__sdeverr(self.sumX, self.sumXX, self.weight)[1]
             yErr = self.__sdeverr(self.sumY, self.sumYY, self.weight)[1]
-            self.sErr = (xErr, yErr)
-        return self.sErr
+            self._sErr = (xErr, yErr)
+        return self._sErr
 
     def LinearEval(self, x):
         """
@@ -211,7 +461,7 @@ class StatsRegClass:
         :rtype: float
         """
         self.LinearRegression()
-        return self.intercept + x * self.slope
+        return self._intercept + x * self._slope
 
     def determinant(self):
         """Compute and return the determinant of the square matrices.
@@ -224,11 +474,12 @@ class StatsRegClass:
         :return: determinants of x and y summation matrices
         :rtype: (float, float)
         """
-        if self.determ == None:
+        self._results()
+        if self._determ is None:
             x = self.weight * self.sumXX - self.sumX ** 2
             y = self.weight * self.sumYY - self.sumY ** 2
-            self.determ = (x, y)
-        return self.determ
+            self._determ = (x, y)
+        return self._determ
 
     def LinearRegression(self):
         """
@@ -242,15 +493,16 @@ class StatsRegClass:
         :return: (a, b) for fit of y=a+b*x
         :rtype: (float, float)
         """
-        if self.slope == None or self.intercept == None:
+        self._results()
+        if self._slope is None or self._intercept is None:
             determ = self.determinant()[0]
-            self.slope = (
+            self._slope = (
                 self.weight * self.sumXY - self.sumX * self.sumY
             ) / determ
-            self.intercept = (
+            self._intercept = (
                 self.sumXX * self.sumY - self.sumX * self.sumXY
             ) / determ
-        return (self.intercept, self.slope)
+        return (self._intercept, self._slope)
 
     def LinearRegressionVariance(self):
         """
@@ -259,12 +511,13 @@ class StatsRegClass:
         :return: (var_a, var_b) -- is this correct?
         :rtype: (float, float)
 		"""
-        if self.lrVariance == None:
+        self._results()
+        if self._lrVariance is None:
             determ = self.determinant()[0]
             slope = math.sqrt(self.weight / determ)
             constant = math.sqrt(self.sumXX / determ)
-            self.lrVariance = (constant, slope)
-        return self.lrVariance
+            self._lrVariance = (constant, slope)
+        return self._lrVariance
 
     def LinearRegressionCorrelation(self):
         """
@@ -276,12 +529,13 @@ class StatsRegClass:
         :see: http://stattrek.com/AP-Statistics-1/Correlation.aspx?Tutorial=Stat
            Look at "Product-moment correlation coefficient"
 		"""
-        if self.r == None:
+        self._results()
+        if self._r is None:
             VarX, VarY = self.determinant()
-            self.r = (
+            self._r = (
                 self.weight * self.sumXX - self.sumX * self.sumY
             ) / math.sqrt(VarX * VarY)
-        return self.r
+        return self._r
 
     def CorrelationCoefficient(self):
         """
@@ -290,15 +544,231 @@ class StatsRegClass:
         :return: correlation coefficient
         :rtype: float
 		"""
-        if self.correlation == None:
-            self.correlation = -self.sumX / math.sqrt(
+        self._results()
+        if self._correlation is None:
+            self._correlation = -self.sumX / math.sqrt(
                 self.weight * self.sumXX
             )
-        return self.correlation
+        return self._correlation
 
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
 
+class WindowedRegression:
+    """
+    Numerically stable linear regression over a sliding window.
+
+    Unlike :class:`StatsRegClass`, which accumulates raw power sums,
+    this keeps the means and the *centered* sums of squares and
+    products, updated with Welford's method.  Pairs can be added and
+    removed in constant time without the catastrophic loss of
+    precision that raw sums suffer with large *x* (such as
+    ``time.time()``) over long runs.  The *x* values are also taken
+    relative to an anchor, the first *x* added.
+
+    PARAMETERS
+
+    window
+        *float* :
+        :meth:`Append` drops pairs with *x* more than ``window``
+        below the newest *x*.
+        (default: no limit)
+    maxlen
+        *int* :
+        :meth:`Append` keeps at most ``maxlen`` pairs.
+        (default: no limit)
+    reanchor
+        *int* :
+        After this many pairs have been dropped by :meth:`Append`,
+        recompute the sums from the pairs in the window, anchored
+        at the oldest *x*, to discard any accumulated rounding.
+        (default: 10000, ``0`` to never recompute)
+
+    .. autosummary::
+        ~Add
+        ~Append
+        ~Clear
+        ~LinearEval
+        ~LinearRegression
+        ~Mean
+        ~StdDev
+        ~Subtract
+    """
+
+    def __init__(self, window=None, maxlen=None, reanchor=10000):
+        """Set up the registers."""
+        self.window = window
+        self.maxlen = maxlen
+        self.reanchor = reanchor
+        self.pairs = collections.deque()
+        self.Clear()
+
+    def Clear(self):
+        """Clear the registers and the window."""
+        self.pairs.clear()
+        self.anchor = None
+        self.count = 0
+        self.meanX = 0.0  # relative to anchor
+        self.meanY = 0.0
+        self.sXX = 0.0  # sum((x - meanX)^2)
+        self.sYY = 0.0
+        self.sXY = 0.0
+        self._dropped = 0
+
+    def Add(self, x, y):
+        """
+        add an X,Y pair to the registers
+
+        :param float x: value to accumulate
+        :param float y: value to accumulate
+        """
+        if self.anchor is None:
+            self.anchor = x
+        x -= self.anchor
+        self.count += 1
+        dx = x - self.meanX
+        dy = y - self.meanY
+        self.meanX += dx / self.count
+        self.meanY += dy / self.count
+        self.sXX += dx * (x - self.meanX)
+        self.sYY += dy * (y - self.meanY)
+        self.sXY += dx * (y - self.meanY)
+        return self.count
+
+    def Subtract(self, x, y):
+        """
+        remove an X,Y pair from the registers
+
+        :param float x: value to remove
+        :param float y: value to remove
+        """
+        if self.count <= 1:
+            pairs = list(self.pairs)
+            self.Clear()
+            self.pairs.extend(pairs)
+            return self.count
+        x -= self.anchor
+        self.count -= 1
+        dx = x - self.meanX
+        dy = y - self.meanY
+        self.meanX -= dx / self.count
+        self.meanY -= dy / self.count
+        self.sXX -= dx * (x - self.meanX)
+        self.sYY -= dy * (y - self.meanY)
+        self.sXY -= dx * (y - self.meanY)
+        return self.count
+
+    def Append(self, x, y):
+        """
+        add an X,Y pair to the window, dropping any that have expired
+
+        Each call costs constant time (amortized).
+
+        :param float x: value to accumulate, not less than the previous
+        :param float y: value to accumulate
+        """
+        self.pairs.append((x, y))
+        self.Add(x, y)
+        pairs = self.pairs
+        while (self.maxlen is not None and len(pairs) > self.maxlen) or (
+            self.window is not None and x - pairs[0][0] > self.window
+        ):
+            self.Subtract(*pairs.popleft())
+            self._dropped += 1
+        if self.reanchor and self._dropped >= self.reanchor:
+            self._recompute()
+        return self.count
+
+    def _recompute(self):
+        """Recompute the registers from the window, re-anchored."""
+        pairs = list(self.pairs)
+        self.Clear()
+        self.pairs.extend(pairs)
+        if len(pairs) == 0:
+            return
+        self.anchor = pairs[0][0]
+        n = len(pairs)
+        self.count = n
+        self.meanX = math.fsum(x - self.anchor for x, _ in pairs) / n
+        self.meanY = math.fsum(y for _, y in pairs) / n
+        for x, y in pairs:
+            dx = x - self.anchor - self.meanX
+            dy = y - self.meanY
+            self.sXX += dx * dx
+            self.sYY += dy * dy
+            self.sXY += dx * dy
+
+    def _require(self, count):
+        """Raise ValueError if there are fewer than ``count`` pairs."""
+        if self.count < count:
+            raise ValueError(
+                f"Need at least {count} pair(s), have {self.count}."
+            )
+
+    def Mean(self):
+        """
+        arithmetic mean of X & Y
+
+        :return: mean X and Y values
+        :rtype: (float, float)
+        :raises ValueError: if there are no pairs
+        """
+        self._require(1)
+        return (self.anchor + self.meanX, self.meanY)
+
+    def StdDev(self):
+        """
+        standard deviation on X & Y
+
+        :return: standard deviation of mean X and Y values
+        :rtype: (float, float)
+        :raises ValueError: if there are no pairs
+        """
+        self._require(1)
+        return (
+            math.sqrt(max(self.sXX, 0) / self.count),
+            math.sqrt(max(self.sYY, 0) / self.count),
+        )
+
+    def LinearRegression(self):
+        """
+        For (*x,y*) data pairs in the registers,
+        fit and find (*a,b*) that satisfy:
+
+        .. math::
+
+          y = a + b x
+
+        :return: (a, b) for fit of y=a+b*x
+        :rtype: (float, float)
+        :raises ValueError: if there are fewer than 2 pairs
+        """
+        slope = self._slope()
+        intercept = self.meanY - slope * (self.anchor + self.meanX)
+        return (intercept, slope)
+
+    def _slope(self):
+        self._require(2)
+        if self.sXX <= 0:
+            raise ValueError("All x values are the same, no slope.")
+        return self.sXY / self.sXX
+
+    def LinearEval(self, x):
+        """
+        Evaluate a linear fit at the given value: :math:`y = a + b x`
+
+        Evaluated about the mean *x*, avoiding the intercept.
+
+        :param x: independent value, `x`
+        :type x: float
+        :return: y
+        :rtype: float
+        :raises ValueError: if there are fewer than 2 pairs
+        """
+        slope = self._slope()
+        return self.meanY + slope * (x - self.anchor - self.meanX)
+
+
 def __selftest():
     """
     internal test StatsReg functions
@@ -406,6 +876,24 @@ def __selftest():
     )
     print("\tCorrelationCoefficient = %g" % reg.CorrelationCoefficient())
 
+    print("---------------------------------------")
+    print("sliding window, x = time.time() (slope 0.01, intercept 5):")
+    t0 = 1.6e9
+    reg.Clear()
+    window = WindowedRegression(window=100)
+    for i in range(100000):
+        x = t0 + i
+        y = 5 + 0.01 * i + 0.01 * np.random.rand()
+        if i > 100:
+            reg.Subtract(*window.pairs[0])
+        window.Append(x, y)
+        reg.Add(x, y)
+    print("\t%s: %g" % ("StatsRegClass slope", reg.LinearRegression()[1]))
+    print(
+        "\t%s: %g"
+        % ("WindowedRegression slope", window.LinearRegression()[1])
+    )
+
 
 if __name__ == "__main__":
     print(
@@ -27,7 +27,7 @@ __license__ = u"(c) " + __copyright__
 __license__ += u" (see LICENSE file for details)"
 __platforms__ = "any"
 __zip_safe__ = False
-__exclude_project_dirs__ = "docs examples tests".split()
+__exclude_project_dirs__ = "benchmarks docs examples tests".split()
 __python_version_required__ = ">=3.6"
 
 __package_name__ = __project__
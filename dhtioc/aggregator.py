@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+"""
+Serve the PVs of many dhtioc IOCs as a few waveform PVs.
+
+.. autosummary::
+    ~FleetAggregator
+    ~main
+
+The aggregator connects once to each of the IOCs (by their PV
+prefix) and serves waveforms, with one element per IOC, in the
+order given.  A dashboard then makes a single Channel Access get
+(or monitor) instead of connecting to every IOC.  The waveforms
+are posted (at most) once per ``period``, when something changed.
+
+EXAMPLE::
+
+    dhtioc_aggregator --prefix dht:fleet: --iocs-file iocs.txt
+
+where ``iocs.txt`` has one IOC prefix per line.
+"""
+
+__all__ = "FleetAggregator main".split()
+
+from caproto import AlarmSeverity, ChannelType
+from caproto.asyncio.client import Context
+from caproto.server import (
+    pvproperty,
+    PVGroup,
+    template_arg_parser,
+    run as run_ioc,
+)
+from textwrap import dedent
+import asyncio
+import logging
+import numpy as np
+
+from .ioc import DHT_IOC
+from .log_handling import setup_logging
+
+logger = logging.getLogger(__name__)
+MAX_IOCS = 1000  # longest waveform
+PUBLISH_PERIOD = 1.0  # s
+
+# DHT_IOC PVs, each served as a FleetAggregator waveform of the same name
+FLEET_SIGNALS = """
+    data_age
+    humidity
+    humidity_trend
+    loop_overruns
+    temperature
+    temperature_trend
+""".split()
+SUMMARIZED = "humidity temperature".split()
+
+
+def _waveform(name, doc, units="", dtype=float):
+    return pvproperty(
+        value=[0],
+        dtype=dtype,
+        max_length=MAX_IOCS,
+        read_only=True,
+        name=name,
+        doc=doc,
+        units=units,
+        record="waveform",
+    )
+
+
+def _summary(name, doc, units):
+    return pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        name=name,
+        doc=doc,
+        units=units,
+        precision=2,
+        record="ai",
+    )
+
+
+class FleetAggregator(PVGroup):
+    """
+    EPICS server (IOC) with the PVs of many ``DHT_IOC`` IOCs.
+
+    .. autosummary::
+        ~connected
+        ~connected_count
+        ~data_age
+        ~humidity
+        ~humidity_max
+        ~humidity_mean
+        ~humidity_min
+        ~humidity_stddev
+        ~humidity_trend
+        ~ioc_prefixes
+        ~loop_overruns
+        ~severity
+        ~temperature
+        ~temperature_max
+        ~temperature_mean
+        ~temperature_min
+        ~temperature_stddev
+        ~temperature_trend
+        ~on_connection
+        ~on_update
+        ~publish
+
+    Each waveform has one element per IOC, in the order of
+    *iocs*.  Values of IOCs that are not connected are NaN and
+    their *severity* is *INVALID*.  The summary statistics
+    (*min*, *max*, *mean*, *stddev*) are of the connected IOCs.
+
+    """
+
+    connected = _waveform(
+        "connected", "1 if connected to the IOC, else 0", dtype=int
+    )
+    connected_count = pvproperty(
+        value=0,
+        dtype=int,
+        read_only=True,
+        name="connected:count",
+        doc="number of connected IOCs",
+        record="longin",
+    )
+    data_age = _waveform("data:age", "time since last sensor reading", "s")
+    humidity = _waveform("humidity", "relative humidity", "%")
+    humidity_max = _summary("humidity:max", "largest humidity", "%")
+    humidity_mean = _summary("humidity:mean", "mean humidity", "%")
+    humidity_min = _summary("humidity:min", "smallest humidity", "%")
+    humidity_stddev = _summary(
+        "humidity:stddev", "std. dev. of the humidities", "%"
+    )
+    humidity_trend = _waveform("humidity:trend", "trend of humidity")
+    ioc_prefixes = pvproperty(
+        value=[""],
+        dtype=ChannelType.STRING,
+        max_length=MAX_IOCS,
+        read_only=True,
+        name="iocs",
+        doc="PV prefix of each IOC",
+    )
+    loop_overruns = _waveform(
+        "loop:overruns", "update cycles past their schedule"
+    )
+    severity = _waveform(
+        "severity", "alarm severity of the sensor PVs", dtype=int
+    )
+    temperature = _waveform("temperature", "temperature", "C")
+    temperature_max = _summary("temperature:max", "largest temperature", "C")
+    temperature_mean = _summary("temperature:mean", "mean temperature", "C")
+    temperature_min = _summary("temperature:min", "smallest temperature", "C")
+    temperature_stddev = _summary(
+        "temperature:stddev", "std. dev. of the temperatures", "C"
+    )
+    temperature_trend = _waveform("temperature:trend", "trend of temperature")
+
+    def __init__(self, *args, iocs, period=PUBLISH_PERIOD, **kwargs):
+        """Constructor."""
+        super().__init__(*args, **kwargs)
+        if not 0 < len(iocs) <= MAX_IOCS:
+            raise ValueError(f"Need 1 to {MAX_IOCS} IOC prefixes.")
+        self.iocs = list(iocs)
+        self.period = period
+        n = len(self.iocs)
+        self.values = {signal: np.full(n, np.nan) for signal in FLEET_SIGNALS}
+        self.is_connected = np.zeros(n, dtype=int)
+        self.severities = np.full(n, int(AlarmSeverity.INVALID_ALARM))
+        self.changed = True
+        self.subscriptions = []
+
+        # PV name: (signal, IOC index)
+        self._signals = {}
+        for i, prefix in enumerate(self.iocs):
+            for signal in FLEET_SIGNALS:
+                pvname = prefix + DHT_IOC._pvs_[signal].pvspec.name
+                self._signals[pvname] = (signal, i)
+
+    @connected.startup
+    async def connected(self, instance, async_lib):
+        """Connect to the IOCs, then post the waveforms as they change."""
+        if async_lib.library is not asyncio:
+            logger.error("aggregator requires the asyncio library")
+            return
+        await self.ioc_prefixes.write(value=self.iocs)
+        context = Context()
+        pvs = await context.get_pvs(
+            *self._signals, connection_state_callback=self.on_connection
+        )
+        for pv in pvs:
+            sub = pv.subscribe(data_type="time")
+            sub.add_callback(self.on_update)
+            self.subscriptions.append(sub)
+        logger.info("aggregating %d IOCs", len(self.iocs))
+
+        while True:
+            if self.changed:
+                self.changed = False
+                await self.publish()
+            await async_lib.library.sleep(self.period)
+
+    def on_connection(self, pv, state):
+        """Connection to an IOC PV changed (called by caproto)."""
+        signal, i = self._signals[pv.name]
+        if state != "connected":
+            self.values[signal][i] = np.nan
+        if signal == "humidity":
+            self.is_connected[i] = int(state == "connected")
+            if state != "connected":
+                self.severities[i] = int(AlarmSeverity.INVALID_ALARM)
+        self.changed = True
+
+    def on_update(self, sub, response):
+        """New value of an IOC PV (called by caproto)."""
+        signal, i = self._signals[sub.pv.name]
+        self.values[signal][i] = response.data[0]
+        if signal == "humidity":
+            self.severities[i] = int(response.metadata.severity)
+        self.changed = True
+
+    async def publish(self):
+        """Post the waveforms and the summary statistics."""
+        for signal, values in self.values.items():
+            await getattr(self, signal).write(value=values.tolist())
+        await self.connected.write(value=self.is_connected.tolist())
+        await self.connected_count.write(value=int(self.is_connected.sum()))
+        await self.severity.write(value=self.severities.tolist())
+        for signal in SUMMARIZED:
+            values = self.values[signal]
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                continue
+            for stat, value in (
+                ("min", values.min()),
+                ("max", values.max()),
+                ("mean", values.mean()),
+                ("stddev", values.std(ddof=1) if len(values) > 1 else 0),
+            ):
+                await getattr(self, f"{signal}_{stat}").write(
+                    value=float(value)
+                )
+
+
+def main():
+    """Entry point for command-line program."""
+    parser, split_args = template_arg_parser(
+        default_prefix="dht:fleet:", desc=dedent(FleetAggregator.__doc__)
+    )
+    parser.add_argument(
+        "--iocs", nargs="+", default=[], help="PV prefixes of the IOCs."
+    )
+    parser.add_argument(
+        "--iocs-file",
+        default=None,
+        help="File with more PV prefixes, one per line.",
+    )
+    parser.add_argument(
+        "--period",
+        type=float,
+        default=PUBLISH_PERIOD,
+        help="Post the waveforms at most this often, s"
+        f" (default: {PUBLISH_PERIOD}).",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices="DEBUG INFO WARNING ERROR CRITICAL".split(),
+        help="Lowest level of dhtioc messages to log (default: INFO).",
+    )
+    args = parser.parse_args()
+    ioc_options, run_options = split_args(args)
+    setup_logging(args.log_level)
+
+    iocs = list(args.iocs)
+    if args.iocs_file is not None:
+        with open(args.iocs_file) as f:
+            iocs += [
+                line.strip()
+                for line in f
+                if line.strip() and not line.startswith("#")
+            ]
+    if len(iocs) == 0:
+        parser.error("no IOC prefixes (use --iocs or --iocs-file)")
+
+    server = FleetAggregator(iocs=iocs, period=args.period, **ioc_options)
+    run_ioc(server.pvdb, **run_options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Clocks that pace the IOC update loop.
+
+.. autosummary::
+    ~VirtualClock
+    ~WallClock
+
+The IOC reads the time, and waits for its next cycle, only
+through its clock.  The :class:`WallClock` is real time.
+The :class:`VirtualClock` runs faster, to replay logged data
+(see :mod:`dhtioc.replay`).
+"""
+
+__all__ = "VirtualClock WallClock".split()
+
+import time
+
+
+class WallClock:
+    """
+    Real time.
+
+    .. autosummary::
+        ~sleep_until
+        ~time
+    """
+
+    def time(self):
+        """Now (``time.time()``)."""
+        return time.time()
+
+    async def sleep_until(self, t, sleep, interval):
+        """
+        Wait until time ``t``.
+
+        PARAMETERS
+
+        t
+            *float* :
+            Time (``time.time()``) to wait for.
+        sleep
+            *coroutine function* :
+            Sleep of the async library, such as ``asyncio.sleep``.
+        interval
+            *float* :
+            Check the time at this interval, s.
+        """
+        while self.time() < t:
+            await sleep(interval)
+
+
+class VirtualClock(WallClock):
+    """
+    Time that starts in the past and runs faster than real time.
+
+    PARAMETERS
+
+    start
+        *float* :
+        Time (``time.time()``) when the clock starts.
+    speed
+        *float* :
+        Ratio of virtual to real time.  When ``None`` (or zero),
+        the clock waits for nothing:  it jumps to the time
+        requested by :meth:`sleep_until`, so the IOC runs as
+        fast as it can.
+        (default: ``None``)
+
+    .. autosummary::
+        ~sleep_until
+        ~time
+    """
+
+    def __init__(self, start, speed=None):
+        """Constructor."""
+        self.start = start
+        self.speed = speed or None
+        self._now = start
+        self._t0 = time.monotonic()
+
+    def time(self):
+        """Now, in virtual time."""
+        if self.speed is not None:
+            self._now = self.start + (time.monotonic() - self._t0) * self.speed
+        return self._now
+
+    async def sleep_until(self, t, sleep, interval):
+        """
+        Wait until virtual time ``t``.
+
+        When running as fast as possible, only yield to the
+        other tasks (such as the Channel Access server).
+        """
+        if self.speed is None:
+            self._now = max(self._now, t)
+            await sleep(0)
+        else:
+            await super().sleep_until(t, sleep, interval)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+"""
+Collect the data files of many IOCs into one database.
+
+.. autosummary::
+    ~Collector
+    ~main
+
+Each directory given is the base of the data files of an IOC
+(or of several), as written by :class:`~dhtioc.datalogger.DataLogger`
+(and copied here, such as by ``rsync``).  The readings are added
+to a :class:`~dhtioc.store.ReadingStore`, under the IOC prefix
+from the header of each file.
+
+The database remembers how many bytes of each file have been
+collected, so a later run reads only what was appended since.
+An incomplete last line (still being written, or torn) is left
+for the next run.
+
+EXAMPLE::
+
+    dhtioc_collect --db fleet.sqlite /data/pi1/dhtioc_raw /data/pi2/dhtioc_raw
+    dhtioc_collect --db fleet.sqlite --list
+    dhtioc_collect --db fleet.sqlite --query dht: --start 2020-11-01
+"""
+
+__all__ = "Collector main".split()
+
+import argparse
+import datetime
+import logging
+import os
+
+from .store import ReadingStore
+
+logger = logging.getLogger(__name__)
+PREFIX_HEADER = "# IOC prefix:"
+FILE_EXTENSION = ".txt"
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS collected_files (
+        path TEXT PRIMARY KEY,
+        prefix TEXT,
+        offset INTEGER NOT NULL
+    );
+"""
+
+
+def _parse(text):
+    """Return (rows, prefix) from complete lines of a data file."""
+    rows = []
+    prefix = None
+    for line in text.splitlines():
+        if line.startswith("#"):
+            if line.startswith(PREFIX_HEADER):
+                prefix = line[len(PREFIX_HEADER) :].strip()
+            continue
+        try:
+            t, rh, c = map(float, line.split())
+        except ValueError:  # damaged line
+            if line.strip():
+                logger.warning("skipped line: %r", line)
+            continue
+        rows.append((t, rh, c))
+    return rows, prefix
+
+
+class Collector:
+    """
+    Add new readings from data files to a database.
+
+    PARAMETERS
+
+    store
+        *obj* :
+        Instance of :class:`~dhtioc.store.ReadingStore`.
+    default_prefix
+        *str* :
+        IOC prefix of files with none in their header.
+        (default: the name of the base directory)
+
+    .. autosummary::
+        ~collect
+        ~collect_file
+    """
+
+    def __init__(self, store, default_prefix=None):
+        """Constructor."""
+        self.store = store
+        self.default_prefix = default_prefix
+        store.connection.executescript(SCHEMA)
+
+    def _progress(self, path):
+        row = self.store.connection.execute(
+            "SELECT prefix, offset FROM collected_files WHERE path = ?",
+            (path,),
+        ).fetchone()
+        return row or (None, 0)
+
+    def collect_file(self, path, default_prefix):
+        """
+        Add the new (complete) lines of one file.
+
+        :return: number of readings read
+        :rtype: int
+        """
+        path = os.path.abspath(path)
+        prefix, offset = self._progress(path)
+        size = os.path.getsize(path)
+        if size < offset:  # file was replaced, start again
+            logger.warning("%s is shorter than before, reading again", path)
+            prefix, offset = None, 0
+        if size == offset:
+            return 0
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read(size - offset)
+        end = data.rfind(b"\n") + 1  # only complete lines
+        if end == 0:
+            return 0
+        rows, header_prefix = _parse(data[:end].decode("utf8", "replace"))
+        prefix = header_prefix or prefix or default_prefix
+
+        # readings and progress, in one transaction
+        with self.store.connection:
+            self.store.insert(prefix, rows, commit=False)
+            self.store.connection.execute(
+                "INSERT OR REPLACE INTO collected_files VALUES (?, ?, ?)",
+                (path, prefix, offset + end),
+            )
+        return len(rows)
+
+    def collect(self, base_path):
+        """
+        Add new readings from all data files under ``base_path``.
+
+        :return: number of files with new readings, number of readings
+        :rtype: (int, int)
+        """
+        default_prefix = self.default_prefix or os.path.basename(
+            os.path.normpath(base_path)
+        )
+        files = readings = 0
+        for path, dirs, names in os.walk(base_path):
+            dirs.sort()
+            for name in sorted(names):
+                if not name.endswith(FILE_EXTENSION):
+                    continue
+                n = self.collect_file(os.path.join(path, name), default_prefix)
+                if n > 0:
+                    files += 1
+                    readings += n
+        logger.info(
+            "%s: %d readings from %d files", base_path, readings, files
+        )
+        return files, readings
+
+
+def _date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").timestamp()
+
+
+def main():
+    """Entry point for command-line program."""
+    from .log_handling import setup_logging
+
+    parser = argparse.ArgumentParser(
+        description="Collect dhtioc data files into one database."
+    )
+    parser.add_argument("paths", nargs="*", help="base directories to collect")
+    parser.add_argument("--db", required=True, help="database file")
+    parser.add_argument(
+        "--prefix",
+        default=None,
+        help="IOC prefix for files without one in their header",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="list the IOCs in the database"
+    )
+    parser.add_argument(
+        "--query", metavar="PREFIX", help="print the readings of an IOC"
+    )
+    parser.add_argument(
+        "--start", type=_date, default=None, help="first day, YYYY-MM-DD"
+    )
+    parser.add_argument(
+        "--end",
+        type=_date,
+        default=None,
+        help="day after the last, YYYY-MM-DD",
+    )
+    args = parser.parse_args()
+    setup_logging()
+
+    store = ReadingStore(args.db)
+    collector = Collector(store, default_prefix=args.prefix)
+    for path in args.paths:
+        collector.collect(path)
+    if args.list:
+        for prefix, count, first, last in store.summary():
+            first = datetime.datetime.fromtimestamp(first)
+            last = datetime.datetime.fromtimestamp(last)
+            print(f"{prefix:20s} {count:10d}  {first} .. {last}")
+    if args.query is not None:
+        for t, rh, c in store.query(args.query, args.start, args.end):
+            print(f"{t:.02f} {rh:.01f} {c:.01f}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 
 __all__ = [
     "DataLogger",
+    "SQLiteDataLogger",
+    "read_file",
+    "recover_file",
 ]
 
 """
@@ -9,23 +12,185 @@ Record raw values in data files.
 
 .. autosummary::
     ~DataLogger
+    ~SQLiteDataLogger
+    ~read_file
+    ~recover_file
 
 """
 
+import concurrent.futures
 import datetime
 import logging
+import numpy as np
 import os
 import time
 from .__init__ import __version__
+from .store import ReadingStore
 
 logger = logging.getLogger(__name__)
-logger.setLevel("DEBUG")
+BATCH_SIZE = 30  # records, SQLiteDataLogger
+BATCH_INTERVAL = 60.0  # s
+MAX_PENDING = 1800  # records kept to write again, SQLiteDataLogger
+WRITE_TIMEOUT = 0.2  # s, wait for another writer, SQLiteDataLogger
+DB_FILE = "dhtioc.sqlite"
+DURABILITY = "none periodic batch".split()
+FSYNC_INTERVAL = 60.0  # s
+HEADER_END = b"# time  RH  T\n"  # last line of the header
+LOAD_WORKERS = 4  # threads, DataLogger.load(), a Pi 4 has 4 cores
+TAIL_SIZE = 4096  # bytes, end of a file checked by recover_file()
+
+
+def read_file(fname):
+    """
+    Read a data file written by :class:`DataLogger`.
+
+    The records are parsed together (``numpy.loadtxt``).  An
+    incomplete last line (a file being written, or torn by a power
+    loss) is ignored.  If there are damaged lines, the records are
+    parsed one line at a time and the damaged lines are skipped,
+    with a warning.
+
+    :param str fname: data file
+    :return: (time, RH, T) rows
+    :rtype: numpy.ndarray
+    """
+    with open(fname, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - len(HEADER_END)))
+        tail = f.read()
+    complete = tail.endswith(b"\n")
+    if tail == HEADER_END or (size < len(HEADER_END) and complete):
+        # no records yet (numpy.loadtxt would warn)
+        return _read_complete_lines(fname)
+    if complete:  # the usual case
+        try:
+            return np.loadtxt(fname, comments="#", ndmin=2).reshape(-1, 3)
+        except ValueError:
+            pass
+    return _read_complete_lines(fname)
+
+
+def _read_complete_lines(fname):
+    """Read the complete, undamaged records of a data file."""
+    with open(fname, "rb") as f:
+        data = f.read()
+    start = 0
+    while data.startswith(b"#", start):
+        start = data.find(b"\n", start) + 1
+        if start == 0:  # header only, without end of line
+            return np.empty((0, 3))
+    end = data.rfind(b"\n") + 1  # only complete lines
+    rows = data.count(b"\n", start, end)
+    if rows == 0:
+        return np.empty((0, 3))
+    try:
+        # numpy parses from a path faster than from a (Python) stream
+        return np.loadtxt(
+            fname,
+            skiprows=data.count(b"\n", 0, start),
+            max_rows=rows,
+            comments=None,
+            ndmin=2,
+        ).reshape(-1, 3)
+    except ValueError:  # damaged line(s), parse one line at a time
+        records = []
+        for line in data[start:end].splitlines():
+            try:
+                t, rh, c = map(float, line.split())
+            except ValueError:
+                continue
+            records.append((t, rh, c))
+        logger.warning(
+            "skipped %d damaged lines in %s", rows - len(records), fname
+        )
+        return np.array(records, dtype=float).reshape(-1, 3)
+
+
+def _is_record(line):
+    """Is this (bytes) line complete: a comment or (time, RH, T)?"""
+    if not line.endswith(b"\n"):
+        return False
+    if line.startswith(b"#"):
+        return True
+    try:
+        return len([float(v) for v in line.split()]) == 3
+    except ValueError:
+        return False
+
+
+def recover_file(fname):
+    """
+    Repair the end of a data file after a power loss.
+
+    A power loss while a data file is written can leave a partial
+    last line, or a damaged (such as zero-filled) end of the file.
+    Truncate the file after its last complete record.  Remove it if
+    it has no records and not even a complete header (the next
+    record creates it again).
+
+    :param str fname: data file
+    :return: number of bytes removed
+    :rtype: int
+    """
+    with open(fname, "r+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - TAIL_SIZE)
+        f.seek(start)
+        tail = f.read()
+        keep = tail.rfind(b"\n") + 1  # drop an incomplete last line
+        while keep > 0:  # drop damaged lines
+            begin = tail.rfind(b"\n", 0, keep - 1) + 1
+            if begin == 0 and start > 0:
+                break  # line begins before the tail, assume it is good
+            if _is_record(tail[begin:keep]):
+                break
+            keep = begin
+        if start == 0 and not tail[:keep].endswith(HEADER_END):
+            has_data = any(
+                not line.startswith(b"#") for line in tail[:keep].splitlines()
+            )
+            if not has_data and HEADER_END not in tail[:keep]:
+                f.close()
+                os.remove(fname)
+                logger.warning("removed damaged data file %s", fname)
+                return size
+        if start + keep < size:
+            f.truncate(start + keep)
+            os.fsync(f.fileno())
+            logger.warning(
+                "removed %d damaged bytes from the end of %s",
+                size - start - keep,
+                fname,
+            )
+        elif tail[:keep].endswith(HEADER_END):
+            logger.info("data file %s has no records", fname)
+    return size - start - keep
 
 
 class DataLogger:
     """
     Record raw values in data files.
 
+    Records are written in batches of ``batch_size`` records (by
+    default, each record when it is received), or at least every
+    ``batch_interval`` seconds, and by :meth:`close`.  Up to a batch
+    of records is lost if the IOC stops without :meth:`close`.
+
+    After a batch is written, the ``durability`` policy sets when
+    the data files are saved to storage (``os.fsync()``), which
+    bounds what a power loss can cost:
+
+    ``"none"``
+        When the operating system chooses (Linux: up to about 30 s
+        later).  Fastest, least wear of an SD card.
+    ``"periodic"``
+        At least every ``fsync_interval`` seconds.
+    ``"batch"``
+        After each batch.
+
+    Call :meth:`recover` (before the first record) to repair the
+    latest data file after a power loss.
+
     PARAMETERS
 
     ioc_prefix
@@ -35,13 +200,48 @@ class DataLogger:
         *str* :
         Base directory path under which to store data files.
         (default: ``~/Documents/dhtioc_raw``)
+    batch_size
+        *int* :
+        Write after this many records.
+        (default: 1)
+    batch_interval
+        *float* :
+        Write records at least this often, s.
+        (default: 60)
+    durability
+        *str* :
+        One of ``"none"``, ``"periodic"``, or ``"batch"``.
+        (default: ``"none"``)
+    fsync_interval
+        *float* :
+        Save to storage at least this often (``"periodic"``), s.
+        (default: 60)
+
+    .. autosummary::
+        ~close
+        ~create_file
+        ~flush
+        ~get_daily_file
+        ~load
+        ~record
+        ~recover
     """
 
-    def __init__(self, ioc_prefix, path=None):
+    def __init__(
+        self,
+        ioc_prefix,
+        path=None,
+        batch_size=1,
+        batch_interval=BATCH_INTERVAL,
+        durability="none",
+        fsync_interval=FSYNC_INTERVAL,
+    ):
         """Constructor."""
-        logger.setLevel("DEBUG")
+        if durability not in DURABILITY:
+            raise ValueError(
+                f"durability={durability!r}, must be one of {DURABILITY}"
+            )
         logger.info("DataLogger starting for: %s", ioc_prefix)
-        print(f"DataLogger starting for {ioc_prefix}")
         self.prefix = ioc_prefix
         self.base_path = path or os.path.abspath(
             os.path.join(
@@ -51,6 +251,50 @@ class DataLogger:
             )
         )
         self.file_extension = "txt"
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.durability = durability
+        self.fsync_interval = fsync_interval
+        self._rows = []  # (datetime, RH, T)
+        self._t_flush = time.monotonic()
+        self._t_fsync = time.monotonic()
+
+    @property
+    def pending(self):
+        """Number of records accepted but not yet written."""
+        return len(self._rows)
+
+    def _fsync_due(self):
+        """Should the written records be saved to storage now?"""
+        if self.durability == "batch":
+            return True
+        if self.durability == "periodic":
+            t = time.monotonic()
+            if t - self._t_fsync >= self.fsync_interval:
+                self._t_fsync = t
+                return True
+        return False
+
+    def flush(self):
+        """Write the pending records."""
+        self._t_flush = time.monotonic()
+        if len(self._rows) == 0:
+            return
+        rows, self._rows = self._rows, []
+        try:
+            self._write(rows)
+        except Exception as exc:
+            # repeats (such as a full disk) are rate limited when
+            # logging is configured by dhtioc.log_handling
+            logger.error(
+                "Continuing after exception, %d records lost: %s",
+                len(rows),
+                exc,
+            )
+
+    def close(self):
+        """Write the pending records and stop."""
+        self.flush()
 
     def get_daily_file(self, when=None):
         """
@@ -77,6 +321,45 @@ class DataLogger:
         )
         return path
 
+    def load(self, start, end=None, workers=LOAD_WORKERS):
+        """
+        Read the data files for a range of days.
+
+        The files are read in parallel by a pool of threads.
+
+        PARAMETERS
+
+        start
+            *obj* :
+            First day, instance of `datetime.date`.
+        end
+            *obj* :
+            Last day (included), instance of `datetime.date`.
+            (default: ``start``)
+        workers
+            *int* :
+            Number of files to read at the same time.
+            (default: 4)
+
+        :return: (time, RH, T) rows, in time order
+        :rtype: numpy.ndarray
+        """
+        end = end or start
+        fnames = []
+        day = start
+        while day <= end:
+            fname = self.get_daily_file(
+                datetime.datetime(day.year, day.month, day.day)
+            )
+            if os.path.exists(fname):
+                fnames.append(fname)
+            day += datetime.timedelta(days=1)
+        if len(fnames) == 0:
+            return np.empty((0, 3))
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            arrays = list(pool.map(read_file, fnames))
+        return np.concatenate(arrays)
+
     def create_file(self, fname):
         """
         Create the data file (and path as necessary)
@@ -115,6 +398,38 @@ class DataLogger:
                 f"#\n"
                 f"# time  RH  T\n"
             )
+        if self.durability != "none":
+            # the new directory entry, too
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def recover(self):
+        """
+        Repair the latest data file after a power loss.
+
+        See :func:`recover_file`.  Call before the first record.
+        An error (such as a read-only file) is logged, not raised.
+
+        :return: number of bytes removed
+        :rtype: int
+        """
+        fname = None
+        for path, dirs, names in os.walk(self.base_path):
+            names = [n for n in names if n.endswith(f".{self.file_extension}")]
+            if len(names) > 0:
+                candidate = os.path.join(path, max(names))
+                if fname is None or candidate > fname:
+                    fname = candidate
+        if fname is None:
+            return 0
+        try:
+            return recover_file(fname)
+        except OSError as exc:
+            logger.error("could not recover %s: %s", fname, exc)
+            return 0
 
     def record(self, humidity, temperature, when=None):
         """
@@ -135,20 +450,185 @@ class DataLogger:
             `datetime.datetime` of these values.
             (default: now)
         """
-        dt = when or datetime.datetime.now()
-        fname = self.get_daily_file(dt)
-        try:
+        self._rows.append(
+            (when or datetime.datetime.now(), humidity, temperature)
+        )
+        if (
+            len(self._rows) >= self.batch_size
+            or time.monotonic() - self._t_flush >= self.batch_interval
+        ):
+            self.flush()
+
+    def _write(self, rows):
+        """Append (datetime, RH, T) rows to their daily files."""
+        files = {}
+        for dt, humidity, temperature in rows:
+            files.setdefault(self.get_daily_file(dt), []).append(
+                f"{dt.timestamp():.02f}"
+                f" {humidity:.01f}"
+                f" {temperature:.01f}\n"
+            )
+        fsync = self._fsync_due()
+        for fname, lines in files.items():
             if not os.path.exists(fname):
                 self.create_file(fname)
             with open(fname, "a") as f:
-                f.write(
-                    f"{dt.timestamp():.02f}"
-                    f" {humidity:.01f}"
-                    f" {temperature:.01f}\n"
-                )
+                f.write("".join(lines))
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+
+
+class SQLiteDataLogger(DataLogger):
+    """
+    Record raw values in a SQLite database, instead of data files.
+
+    Records are written together, in one transaction, every
+    ``batch_size`` records or ``batch_interval`` seconds (whichever
+    comes first), and by :meth:`close`.  The database (see
+    :class:`~dhtioc.store.ReadingStore`) is indexed by IOC prefix
+    and time, in WAL mode, and may be shared by the IOCs of
+    several sensors.
+
+    With ``durability="batch"``, each transaction is saved to
+    storage when committed (``PRAGMA synchronous=FULL``).  With
+    ``"periodic"``, the WAL is written into the database (and saved
+    to storage) every ``fsync_interval`` seconds.  SQLite repairs
+    the database itself when opened after a power loss.
+
+    The records are written in the IOC update loop, so it waits at
+    most ``WRITE_TIMEOUT`` seconds while another IOC (or the
+    collector) writes.  A batch that cannot be written (such as when
+    the database stays locked) is kept and written with the next batch.
+    Only the newest ``max_pending`` records are kept: older ones are
+    dropped (and logged) if the database cannot be written for long.
+
+    PARAMETERS
+
+    ioc_prefix
+        *str* :
+        EPICS IOC prefix
+    db_file
+        *str* :
+        Database file.
+        (default: ``dhtioc.sqlite`` in ``path``)
+    path
+        *str* :
+        Base directory path.
+        (default: ``~/Documents/dhtioc_raw``)
+    batch_size
+        *int* :
+        Write after this many records.
+        (default: 30)
+    max_pending
+        *int* :
+        Most records kept when they cannot be written.
+        (default: 1800)
+
+    Other keyword arguments are those of :class:`DataLogger`.
+
+    .. autosummary::
+        ~close
+        ~flush
+        ~load
+        ~recover
+    """
+
+    def __init__(
+        self,
+        ioc_prefix,
+        db_file=None,
+        path=None,
+        batch_size=BATCH_SIZE,
+        max_pending=MAX_PENDING,
+        **kwargs,
+    ):
+        """Constructor."""
+        super().__init__(
+            ioc_prefix, path=path, batch_size=batch_size, **kwargs
+        )
+        self.max_pending = max(max_pending, batch_size)
+        self._backlog = []  # records that could not be written yet
+        self.db_file = db_file or os.path.join(self.base_path, DB_FILE)
+        os.makedirs(
+            os.path.dirname(os.path.abspath(self.db_file)), exist_ok=True
+        )
+        self.store = ReadingStore(self.db_file, timeout=WRITE_TIMEOUT)
+        if self.durability == "batch":
+            self.store.connection.execute("PRAGMA synchronous=FULL")
+
+    @property
+    def pending(self):
+        """Number of records accepted but not yet written."""
+        return len(self._backlog) + len(self._rows)
+
+    def flush(self):
+        """Write the pending records, keep them if that fails."""
+        self._t_flush = time.monotonic()
+        if self.pending == 0:
+            return
+        rows = self._backlog + self._rows
+        self._backlog, self._rows = [], []
+        try:
+            self._write(rows)
         except Exception as exc:
-            logger.error("Continuing after exception: %s", exc)
-            print(f"Continuing after exception: {exc}")
+            # try again with the next batch (not the next record);
+            # rows already inserted are skipped when written again
+            lost = max(0, len(rows) - self.max_pending)
+            self._backlog = rows[lost:]
+            logger.error(
+                "Continuing after exception, %d records kept, %d lost: %s",
+                len(self._backlog),
+                lost,
+                exc,
+            )
+
+    def close(self):
+        """Write the pending records and close the database."""
+        self.flush()
+        self.store.close()
+
+    def load(self, start, end=None):
+        """
+        Read the records for a range of days.
+
+        PARAMETERS
+
+        start
+            *obj* :
+            First day, instance of `datetime.date`.
+        end
+            *obj* :
+            Last day (included), instance of `datetime.date`.
+            (default: ``start``)
+
+        :return: (time, RH, T) rows, in time order
+        :rtype: numpy.ndarray
+        """
+        end = (end or start) + datetime.timedelta(days=1)
+        self.flush()
+        return self.store.query(
+            self.prefix,
+            datetime.datetime(start.year, start.month, start.day).timestamp(),
+            datetime.datetime(end.year, end.month, end.day).timestamp(),
+        )
+
+    def recover(self):
+        """Nothing to do, SQLite repairs the database when opened."""
+        return 0
+
+    def _write(self, rows):
+        """Insert (datetime, RH, T) rows, in one transaction."""
+        # same resolution as the data files
+        self.store.insert(
+            self.prefix,
+            [
+                (round(dt.timestamp(), 2), round(rh, 1), round(t, 1))
+                for dt, rh, t in rows
+            ],
+        )
+        if self.durability == "periodic" and self._fsync_due():
+            self.store.connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
 
 
 if __name__ == "__main__":
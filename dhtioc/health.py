@@ -0,0 +1,109 @@
+"""
+Measure the health of the IOC update loop.
+
+.. autosummary::
+    ~LoopHealth
+    ~HISTOGRAM_BINS
+
+"""
+
+__all__ = "HISTOGRAM_BINS LoopHealth".split()
+
+import bisect
+import time
+
+# upper edges (s) of the cycle duration histogram bins
+# the last bin (not listed here) collects anything longer
+HISTOGRAM_BINS = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0,
+)
+
+
+class LoopHealth:
+    """
+    Running measures of the IOC update loop.
+
+    Each cycle of the loop calls :meth:`wake` when it starts
+    and :meth:`done` when its work is finished.  Only a few
+    clock reads and arithmetic operations are done per cycle.
+
+    PARAMETERS
+
+    histogram
+        *bool* :
+        Accumulate a histogram of cycle durations.
+        (default: ``False``)
+    bins
+        *[float]* :
+        Upper edges (s) of the histogram bins.
+        (default: ``HISTOGRAM_BINS``)
+    clock
+        *callable* :
+        Returns the time now, such as the ``time()`` method of
+        a :class:`~dhtioc.clock.VirtualClock`.
+        (default: ``time.time``)
+
+    .. autosummary::
+        ~wake
+        ~done
+        ~logger_done
+    """
+
+    def __init__(self, histogram=False, bins=HISTOGRAM_BINS, clock=time.time):
+        """Constructor."""
+        self.bins = list(bins)
+        self.clock = clock
+        self.cycle_duration = 0  # s, most recent cycle
+        self.jitter = 0  # s, how late the most recent cycle woke
+        self.logger_latency = 0  # s, most recent datalogger write
+        self.overruns = 0  # cycles that ran past the next scheduled start
+        self.cycles = 0
+        self.histogram = None
+        if histogram:
+            self.histogram = [0] * (len(self.bins) + 1)
+        self._t_wake = None
+
+    def wake(self, t_scheduled):
+        """
+        Start of a cycle that was scheduled for ``t_scheduled``.
+
+        PARAMETERS
+
+        t_scheduled
+            *float* :
+            Time (``time.time()``) this cycle should have started.
+        """
+        self._t_wake = self.clock()
+        self.jitter = self._t_wake - t_scheduled
+
+    def done(self, t_next):
+        """
+        End of the work in this cycle.
+
+        PARAMETERS
+
+        t_next
+            *float* :
+            Time (``time.time()``) the next cycle should start.
+        """
+        t = self.clock()
+        self.cycles += 1
+        self.cycle_duration = t - self._t_wake
+        if t > t_next:
+            self.overruns += 1
+        if self.histogram is not None:
+            self.histogram[
+                bisect.bisect_left(self.bins, self.cycle_duration)
+            ] += 1
+
+    def logger_done(self, t_start):
+        """
+        Datalogger write, started at ``t_start``, has finished.
+
+        PARAMETERS
+
+        t_start
+            *float* :
+            Time (``time.time()``) the write was started.
+        """
+        self.logger_latency = self.clock() - t_start
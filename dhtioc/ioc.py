@@ -12,22 +12,72 @@ Provide humidity and temperature using EPICS and Raspberry Pi
 # https://learn.adafruit.com/circuitpython-on-raspberrypi-linux/installing-circuitpython-on-raspberry-pi
 # https://pinout.xyz/
 
+import asyncio
 import atexit
+import datetime
+from caproto import AlarmSeverity, AlarmStatus
 from caproto.server import (
     pvproperty,
     PVGroup,
-    ioc_arg_parser,
+    template_arg_parser,
     run as run_ioc,
 )
 from textwrap import dedent
-import time
+import logging
+import os
+import signal
 
-from .datalogger import DataLogger
+from .clock import VirtualClock, WallClock
+from .datalogger import DURABILITY, FSYNC_INTERVAL
+from .datalogger import DataLogger, SQLiteDataLogger
+from .health import HISTOGRAM_BINS, LoopHealth
+from .log_handling import setup_logging
+from .metrics import MetricsExporter
+from .profiler import StackSampler
+from .psychrometrics import derive, in_domain
+from .running_stats import DailyStats, RollingStats
+from .StatsReg import REGISTERS, WindowedRegression
 from .trend_analysis import SMOOTHING_FACTOR, Trend
 from .utils import C2F, smooth
 
+logger = logging.getLogger(__name__)
 INNER_LOOP_SLEEP = 0.01  # s
 REPORT_PERIOD = 2.0  # s, read the DHT22 at this interval (no faster)
+STALE_TIMEOUT = 30.0  # s, sensor PVs are INVALID after no new reading
+RATE_WINDOWS = (300.0, 1800.0, 7200.0)  # s, short, medium, long
+RATE_TIERS = "short medium long".split()
+PROFILE_DURATION = 30.0  # s, profile taken on SIGUSR1
+
+# PVs (DHT_IOC attribute names) left out when their option is disabled
+OPTIONAL_PVS = {
+    "fahrenheit": """
+        dew_point_f dew_point_f_raw
+        heat_index_f heat_index_f_raw
+        temperature_f temperature_f_raw
+    """.split(),
+    "trend_arrays": """
+        humidity_trend_array temperature_trend_array trend_axis_array
+    """.split(),
+    "psychrometrics": """
+        absolute_humidity absolute_humidity_raw
+        dew_point dew_point_f dew_point_raw dew_point_f_raw
+        heat_index heat_index_f heat_index_raw heat_index_f_raw
+        vapor_pressure vapor_pressure_raw
+    """.split(),
+    "rates": """
+        humidity_rate_short humidity_rate_medium humidity_rate_long
+        temperature_rate_short temperature_rate_medium temperature_rate_long
+        rate_windows
+    """.split(),
+    "statistics": [
+        f"{signal}_{period}_{stat}"
+        for signal in ("humidity", "temperature")
+        for period in ("24h", "day")
+        for stat in ("min", "max", "mean", "stddev")
+    ]
+    + ["humidity_day_registers", "temperature_day_registers"],
+    "loop_histogram_enabled": "loop_histogram loop_histogram_bins".split(),
+}
 
 
 class DHT_IOC(PVGroup):
@@ -35,20 +85,140 @@ class DHT_IOC(PVGroup):
     EPICS server (IOC) with humidity & temperature (read-only) PVs.
 
     .. autosummary::
+        ~absolute_humidity
+        ~absolute_humidity_raw
         ~counter
+        ~data_age
+        ~dew_point
+        ~dew_point_f
+        ~dew_point_f_raw
+        ~dew_point_raw
+        ~heat_index
+        ~heat_index_f
+        ~heat_index_f_raw
+        ~heat_index_raw
         ~humidity
+        ~humidity_24h_min
+        ~humidity_24h_max
+        ~humidity_24h_mean
+        ~humidity_24h_stddev
+        ~humidity_day_min
+        ~humidity_day_max
+        ~humidity_day_mean
+        ~humidity_day_stddev
+        ~humidity_day_registers
+        ~humidity_rate_short
+        ~humidity_rate_medium
+        ~humidity_rate_long
         ~humidity_raw
         ~humidity_trend
         ~humidity_trend_array
+        ~logger_latency
+        ~loop_duration
+        ~loop_histogram
+        ~loop_histogram_bins
+        ~loop_jitter
+        ~loop_overruns
+        ~profile
+        ~rate_windows
         ~temperature
+        ~temperature_24h_min
+        ~temperature_24h_max
+        ~temperature_24h_mean
+        ~temperature_24h_stddev
+        ~temperature_day_min
+        ~temperature_day_max
+        ~temperature_day_mean
+        ~temperature_day_stddev
+        ~temperature_day_registers
+        ~temperature_rate_short
+        ~temperature_rate_medium
+        ~temperature_rate_long
         ~temperature_raw
         ~temperature_f
         ~temperature_f_raw
         ~temperature_trend
         ~temperature_trend_array
+        ~trend_axis_array
+        ~vapor_pressure
+        ~vapor_pressure_raw
+        ~update
+        ~update_psychrometrics
+        ~update_rates
+        ~update_statistics
+        ~seed_statistics
+        ~update_alarm
+        ~update_derived_alarm
+        ~update_health
+        ~start_profile
+
+    Sensor PVs are only posted when the sensor provides a new
+    reading, time stamped when that reading was taken.  If no new
+    reading arrives within ``stale_timeout`` seconds (of the last
+    one, or of the start if the sensor has not given any), the
+    sensor PVs get *INVALID* alarm severity (status *TIMEOUT*)
+    until one does.  So do the PVs derived from them (dew point,
+    heat index, ...), which are also *INVALID* (status *CALC*)
+    while the readings are outside the range of the formulas
+    (such as 0 %RH, see :func:`~dhtioc.psychrometrics.in_domain`).
+
+    The *rate* PVs give the rate of change (per hour) over the short,
+    medium, and long ``rate_windows`` (seconds), from a linear
+    regression of the readings in each window.
+
+    The *24h* and *day* PVs give running statistics of the raw
+    readings over the last 24 hours and since (local) midnight.
+    When the readings are logged, these statistics start from the
+    readings logged in that time (before a restart).
+    The *day:registers* PVs hold the statistics registers for
+    aggregation across IOCs (see ``StatsRegClass.from_array()``).
+
+    Groups of PVs (see ``OPTIONAL_PVS``) may be left out with the
+    ``fahrenheit``, ``trend_arrays``, ``psychrometrics``, ``rates``,
+    ``statistics``, and ``loop_histogram`` keyword arguments.  Their
+    values are then neither computed nor served.
+
+    All times come from the ``clock`` (default: real time).  To
+    replay logged data (see :mod:`dhtioc.replay`), pass a
+    ``ReplaySensor`` and its ``VirtualClock``.  When the replay is
+    finished, the IOC stops (as with ^C) if ``exit_when_finished``,
+    otherwise it serves the last values.  Readings are
+    recorded in data files under ``log_path`` unless ``log_data``
+    is ``False``.  With ``log_db``, they are recorded in that SQLite
+    database instead.  ``log_options`` are more keyword arguments
+    of the :class:`~dhtioc.datalogger.DataLogger` (batches and
+    durability).  The latest data file is repaired (after a power
+    loss) before the first reading is recorded.
+
+    Write a duration (s) to the *profile* PV (or send ``SIGUSR1``)
+    to sample the stacks of all the IOC threads for that long (see
+    :mod:`dhtioc.profiler`).  The result is written under
+    ``profile_path`` (default: ``profiles`` in the data directory).
 
     """
 
+    absolute_humidity = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="absolute_humidity",
+        doc="absolute humidity",
+        units="g/m^3",
+        precision=3,
+        record="ai",
+    )
+    absolute_humidity_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="absolute_humidity:raw",
+        doc="absolute humidity: most recent reading",
+        units="g/m^3",
+        precision=2,
+        record="ai",
+    )
     counter = pvproperty(
         value=0,
         dtype=int,
@@ -57,20 +227,249 @@ class DHT_IOC(PVGroup):
         doc="counter",
         record="longin",
     )
+    data_age = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        name="data:age",
+        doc="time since last successful sensor reading",
+        units="s",
+        precision=2,
+        record="ai",
+    )
+    dew_point = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="dew_point",
+        doc="dew point",
+        units="C",
+        precision=3,
+        record="ai",
+    )
+    dew_point_f = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="dew_point:F",
+        doc="dew point",
+        units="F",
+        precision=3,
+        record="ai",
+    )
+    dew_point_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="dew_point:raw",
+        doc="dew point: most recent reading",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    dew_point_f_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="dew_point:F:raw",
+        doc="dew point: most recent reading",
+        units="F",
+        precision=2,
+        record="ai",
+    )
+    heat_index = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="heat_index",
+        doc="heat index",
+        units="C",
+        precision=3,
+        record="ai",
+    )
+    heat_index_f = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="heat_index:F",
+        doc="heat index",
+        units="F",
+        precision=3,
+        record="ai",
+    )
+    heat_index_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="heat_index:raw",
+        doc="heat index: most recent reading",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    heat_index_f_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="heat_index:F:raw",
+        doc="heat index: most recent reading",
+        units="F",
+        precision=2,
+        record="ai",
+    )
     humidity = pvproperty(
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="humidity",
         doc="relative humidity",
         units="%",
         precision=3,
         record="ai",
     )
+    humidity_24h_min = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:24h:min",
+        doc="relative humidity: minimum, last 24 hours",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_24h_max = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:24h:max",
+        doc="relative humidity: maximum, last 24 hours",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_24h_mean = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:24h:mean",
+        doc="relative humidity: mean, last 24 hours",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_24h_stddev = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:24h:stddev",
+        doc="relative humidity: standard deviation, last 24 hours",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_day_min = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:day:min",
+        doc="relative humidity: minimum, today",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_day_max = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:day:max",
+        doc="relative humidity: maximum, today",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_day_mean = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:day:mean",
+        doc="relative humidity: mean, today",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_day_stddev = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:day:stddev",
+        doc="relative humidity: standard deviation, today",
+        units="%",
+        precision=2,
+        record="ai",
+    )
+    humidity_day_registers = pvproperty(
+        value=[0] * len(REGISTERS),
+        dtype=float,
+        read_only=True,
+        name="humidity:day:registers",
+        doc="humidity statistics registers today (StatsRegClass)",
+        record="waveform",
+    )
+    humidity_rate_short = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:rate:short",
+        doc="rate of change of relative humidity, short window",
+        units="%/h",
+        precision=3,
+        record="ai",
+    )
+    humidity_rate_medium = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:rate:medium",
+        doc="rate of change of relative humidity, medium window",
+        units="%/h",
+        precision=3,
+        record="ai",
+    )
+    humidity_rate_long = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="humidity:rate:long",
+        doc="rate of change of relative humidity, long window",
+        units="%/h",
+        precision=3,
+        record="ai",
+    )
     humidity_raw = pvproperty(
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="humidity:raw",
         doc="relative humidity: most recent reading",
         units="%",
@@ -81,6 +480,7 @@ class DHT_IOC(PVGroup):
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="humidity:trend",
         doc="trend in relative humidity",
         units="a.u.",
@@ -91,16 +491,93 @@ class DHT_IOC(PVGroup):
         value=[0, 0, 0, 0, 0, 0, 0,],
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="humidity:trend:array",
         doc="relative humidity trend",
         units="%",
         precision=4,
         record="waveform",
     )
+    logger_latency = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        name="logger:latency",
+        doc="time to write the most recent data file record",
+        units="s",
+        precision=6,
+        record="ai",
+    )
+    loop_duration = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        name="loop:duration",
+        doc="time to complete the most recent update cycle",
+        units="s",
+        precision=6,
+        record="ai",
+    )
+    loop_histogram = pvproperty(
+        value=[0] * (len(HISTOGRAM_BINS) + 1),
+        dtype=int,
+        read_only=True,
+        name="loop:histogram",
+        doc="number of update cycles in each duration bin",
+        record="waveform",
+    )
+    loop_histogram_bins = pvproperty(
+        value=list(HISTOGRAM_BINS) + [float("inf")],
+        dtype=float,
+        read_only=True,
+        name="loop:histogram:bins",
+        doc="upper edge of each update cycle duration bin",
+        units="s",
+        precision=3,
+        record="waveform",
+    )
+    loop_jitter = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        name="loop:jitter",
+        doc="how late the most recent update cycle started",
+        units="s",
+        precision=6,
+        record="ai",
+    )
+    loop_overruns = pvproperty(
+        value=0,
+        dtype=int,
+        read_only=True,
+        name="loop:overruns",
+        doc="update cycles that ran past the next scheduled start",
+        record="longin",
+    )
+    profile = pvproperty(
+        value=0,
+        dtype=float,
+        name="profile",
+        doc="write a duration (s) to profile the IOC",
+        units="s",
+        precision=1,
+        record="ao",
+    )
+    rate_windows = pvproperty(
+        value=list(RATE_WINDOWS),
+        dtype=float,
+        read_only=True,
+        name="rate:windows",
+        doc="length of the short, medium, and long rate windows",
+        units="s",
+        precision=0,
+        record="waveform",
+    )
     temperature = pvproperty(
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature",
         doc="temperature",
         units="C",
@@ -111,16 +588,147 @@ class DHT_IOC(PVGroup):
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature:F",
         doc="temperature",
         units="F",
         precision=3,
         record="ai",
     )
+    temperature_24h_min = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:24h:min",
+        doc="temperature: minimum, last 24 hours",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_24h_max = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:24h:max",
+        doc="temperature: maximum, last 24 hours",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_24h_mean = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:24h:mean",
+        doc="temperature: mean, last 24 hours",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_24h_stddev = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:24h:stddev",
+        doc="temperature: standard deviation, last 24 hours",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_day_min = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:day:min",
+        doc="temperature: minimum, today",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_day_max = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:day:max",
+        doc="temperature: maximum, today",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_day_mean = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:day:mean",
+        doc="temperature: mean, today",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_day_stddev = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:day:stddev",
+        doc="temperature: standard deviation, today",
+        units="C",
+        precision=2,
+        record="ai",
+    )
+    temperature_day_registers = pvproperty(
+        value=[0] * len(REGISTERS),
+        dtype=float,
+        read_only=True,
+        name="temperature:day:registers",
+        doc="temperature statistics registers today (StatsRegClass)",
+        record="waveform",
+    )
+    temperature_rate_short = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:rate:short",
+        doc="rate of change of temperature, short window",
+        units="C/h",
+        precision=3,
+        record="ai",
+    )
+    temperature_rate_medium = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:rate:medium",
+        doc="rate of change of temperature, medium window",
+        units="C/h",
+        precision=3,
+        record="ai",
+    )
+    temperature_rate_long = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="sensor",
+        name="temperature:rate:long",
+        doc="rate of change of temperature, long window",
+        units="C/h",
+        precision=3,
+        record="ai",
+    )
     temperature_raw = pvproperty(
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature:raw",
         doc="temperature: most recent reading",
         units="C",
@@ -131,6 +739,7 @@ class DHT_IOC(PVGroup):
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature:F:raw",
         doc="temperature: most recent reading",
         units="F",
@@ -141,6 +750,7 @@ class DHT_IOC(PVGroup):
         value=0,
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature:trend",
         doc="trend in temperature",
         units="a.u.",
@@ -151,6 +761,7 @@ class DHT_IOC(PVGroup):
         value=[0, 0, 0, 0, 0, 0, 0,],
         dtype=float,
         read_only=True,
+        alarm_group="sensor",
         name="temperature:trend:array",
         doc="temperature trend",
         units="C",
@@ -167,13 +778,79 @@ class DHT_IOC(PVGroup):
         precision=4,
         record="waveform",
     )
+    vapor_pressure = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="vapor_pressure",
+        doc="partial pressure of water vapor",
+        units="hPa",
+        precision=3,
+        record="ai",
+    )
+    vapor_pressure_raw = pvproperty(
+        value=0,
+        dtype=float,
+        read_only=True,
+        alarm_group="psychrometrics",
+        name="vapor_pressure:raw",
+        doc="partial pressure of water vapor: most recent reading",
+        units="hPa",
+        precision=2,
+        record="ai",
+    )
 
-    def __init__(self, *args, sensor, report_period, **kwargs):
+    def __init__(
+        self,
+        *args,
+        sensor,
+        report_period,
+        loop_histogram=False,
+        metrics=None,
+        stale_timeout=STALE_TIMEOUT,
+        fahrenheit=True,
+        trend_arrays=True,
+        psychrometrics=True,
+        rates=True,
+        rate_windows=RATE_WINDOWS,
+        statistics=True,
+        clock=None,
+        log_path=None,
+        log_data=True,
+        log_db=None,
+        log_options=None,
+        profile_path=None,
+        exit_when_finished=False,
+        **kwargs,
+    ):
         """Constructor."""
         super().__init__(*args, **kwargs)
 
+        self.fahrenheit = fahrenheit
+        self.trend_arrays = trend_arrays
+        self.psychrometrics = psychrometrics
+        self.rates = rates
+        self.statistics = statistics
+        self.loop_histogram_enabled = loop_histogram
+        for option, attrs in OPTIONAL_PVS.items():
+            if not getattr(self, option):
+                for attr in attrs:
+                    # caproto serves only the PVs in pvdb
+                    self.pvdb.pop(getattr(self, attr).pvname, None)
+
         self.device = sensor
         self.period = report_period
+        self.clock = clock or WallClock()
+        self.health = LoopHealth(
+            histogram=loop_histogram, clock=self.clock.time
+        )
+        self.metrics = metrics
+        self.stale_timeout = stale_timeout
+        self.stale = False
+        self.out_of_domain = False  # derived PVs cannot be computed
+        self._t_sample = None  # sensor timestamp of the latest update
+        self._t_start = None  # when the update loop started
         self.prefix = kwargs.get("prefix", "PREFIX NOT PROVIDED")
         self.smoothing = SMOOTHING_FACTOR
 
@@ -181,84 +858,576 @@ class DHT_IOC(PVGroup):
         self._humidity_trend = Trend()
         self._temperature = None
         self._temperature_trend = Trend()
+        # assumes same keys for humidity & temperature trends
+        self._trend_keys = sorted(self._humidity_trend.cache.keys())
+
+        self._rate_windows = list(rate_windows)
+        self._rates = {
+            (signal, tier): WindowedRegression(window=window)
+            for signal in ("humidity", "temperature")
+            for tier, window in zip(RATE_TIERS, rate_windows)
+        }
 
-        self.datalogger = DataLogger(self.prefix)
+        self._statistics = {
+            signal: dict(day=DailyStats(), **{"24h": RollingStats()})
+            for signal in ("humidity", "temperature")
+        }
+
+        self.log_data = log_data
+        log_options = log_options or {}
+        if log_db is None:
+            self.datalogger = DataLogger(
+                self.prefix, path=log_path, **log_options
+            )
+        else:
+            self.datalogger = SQLiteDataLogger(
+                self.prefix, log_db, path=log_path, **log_options
+            )
+        if log_data:
+            self.datalogger.recover()
+            if statistics:
+                self.seed_statistics()
+        self.profiler = StackSampler()
+        self.profile_path = profile_path
+        self.exit_when_finished = exit_when_finished
 
         atexit.register(self.device.terminate_background_thread)
+        atexit.register(self.datalogger.close)
 
     @humidity.startup
     async def humidity(self, instance, async_lib):
         """Set the humidity, temperature and other PVs."""
-        t_next_read = time.time()
+        if self.metrics is not None:
+            if async_lib.library is asyncio:
+                try:
+                    await self.metrics.start()
+                except OSError as exc:  # such as: port in use
+                    logger.error("metrics endpoint disabled: %s", exc)
+                    self.metrics = None
+            else:
+                logger.error("metrics endpoint requires the asyncio library")
+                self.metrics = None
+        if self.trend_arrays:
+            # does not change
+            await self.trend_axis_array.write(
+                value=[1 - factor for factor in self._trend_keys]
+            )
+        if self.rates:
+            await self.rate_windows.write(value=self._rate_windows)
+        t_next_read = self._t_start = self.clock.time()
         while True:
+            self.health.wake(t_next_read)
             t_next_read += self.period
-            if self.device.ready:
-                rh_raw = self.device.humidity
-                self._humidity = smooth(
-                    rh_raw, self.smoothing, self._humidity
+            await self.update_alarm()
+            if self.device.ready and self.device.timestamp != self._t_sample:
+                await self.update()
+            self.health.done(t_next_read)
+            await self.update_health()
+            if self.metrics is not None:
+                self.metrics.update(self.metrics.collect(self))
+            if self.profile.value and not self.profiler.running:
+                await self.profile.write(0)  # profile is finished
+            if getattr(self.device, "finished", False):
+                # the clock may have reached the last reading
+                # since the update above
+                if self.device.timestamp != self._t_sample:
+                    await self.update()
+                logger.info(
+                    "replay finished, %d readings", self.device.read_count
                 )
-                self._humidity_trend.compute(rh_raw)
-                await self.humidity_raw.write(value=rh_raw)
-                await self.humidity.write(value=self._humidity)
-                await self.humidity_trend.write(
-                    value=self._humidity_trend.slope
+                if self.exit_when_finished:
+                    os.kill(os.getpid(), signal.SIGINT)
+                break
+
+            await self.clock.sleep_until(
+                t_next_read, async_lib.library.sleep, INNER_LOOP_SLEEP
+            )
+
+    @profile.putter
+    async def profile(self, instance, value):
+        """Start a profile of ``value`` seconds."""
+        if self.profiler.running:
+            return instance.value  # one profile at a time
+        if value > 0:
+            self.start_profile(value)
+        return value
+
+    def start_profile(self, duration):
+        """
+        Profile the IOC for ``duration`` seconds (in the background).
+
+        :return: name of the file to be written, ``None`` if a
+            profile is already running
+        :rtype: str
+        """
+        path = self.profile_path or os.path.join(
+            self.datalogger.base_path, "profiles"
+        )
+        fname = os.path.join(
+            path, f"profile-{datetime.datetime.now():%Y%m%d-%H%M%S}.folded"
+        )
+        if self.profiler.start(duration, fname):
+            return fname
+
+    async def update(self):
+        """Read the sensor, update the PVs, and record the values."""
+        t_sample = self._t_sample = self.device.timestamp
+        rh_raw = self.device.humidity
+        t_raw = self.device.temperature
+
+        self._humidity = smooth(rh_raw, self.smoothing, self._humidity)
+        self._humidity_trend.compute(rh_raw)
+        await self.humidity_raw.write(value=rh_raw, timestamp=t_sample)
+        await self.humidity.write(value=self._humidity, timestamp=t_sample)
+        await self.humidity_trend.write(
+            value=self._humidity_trend.slope, timestamp=t_sample
+        )
+        if self.trend_arrays:
+            cache = self._humidity_trend.cache
+            await self.humidity_trend_array.write(
+                value=[cache[factor] for factor in self._trend_keys],
+                timestamp=t_sample,
+            )
+
+        self._temperature = smooth(
+            t_raw, self.smoothing, self._temperature
+        )
+        self._temperature_trend.compute(t_raw)
+        await self.temperature_raw.write(value=t_raw, timestamp=t_sample)
+        await self.temperature.write(
+            value=self._temperature, timestamp=t_sample
+        )
+        await self.temperature_trend.write(
+            value=self._temperature_trend.slope, timestamp=t_sample
+        )
+        if self.fahrenheit:
+            await self.temperature_f_raw.write(
+                value=C2F(t_raw), timestamp=t_sample
+            )
+            await self.temperature_f.write(
+                value=C2F(self._temperature), timestamp=t_sample
+            )
+        if self.trend_arrays:
+            cache = self._temperature_trend.cache
+            await self.temperature_trend_array.write(
+                value=[cache[factor] for factor in self._trend_keys],
+                timestamp=t_sample,
+            )
+
+        if self.psychrometrics:
+            await self.update_psychrometrics(rh_raw, t_raw, t_sample)
+        if self.rates:
+            await self.update_rates(rh_raw, t_raw, t_sample)
+        if self.statistics:
+            await self.update_statistics(rh_raw, t_raw, t_sample)
+
+        # counts only new readings
+        await self.counter.write(
+            value=self.counter.value + 1, timestamp=t_sample
+        )
+
+        if self.log_data:
+            t_start = self.clock.time()
+            self.datalogger.record(
+                rh_raw, t_raw, datetime.datetime.fromtimestamp(t_sample)
+            )
+            self.health.logger_done(t_start)
+
+    async def update_rates(self, rh_raw, t_raw, t_sample):
+        """Update the rate of change PVs, in units per hour."""
+        for (name, tier), regression in self._rates.items():
+            reading = rh_raw if name == "humidity" else t_raw
+            regression.Append(t_sample, reading)
+            if regression.count > 1:
+                rate = regression.LinearRegression()[1] * 3600
+                await getattr(self, f"{name}_rate_{tier}").write(
+                    value=rate, timestamp=t_sample
                 )
 
-                keys = sorted(self._humidity_trend.cache.keys())
-                arr = [1 - factor for factor in keys]
-                await self.trend_axis_array.write(value=arr)
-                arr = [
-                    self._humidity_trend.cache[factor] for factor in keys
-                ]
-                await self.humidity_trend_array.write(value=arr)
+    def seed_statistics(self):
+        """
+        Start the running statistics from the readings logged before.
+
+        So the *day* and *24h* statistics cover their whole period
+        after a restart, not only the time since.
+        """
+        now = self.clock.time()
+        today = datetime.datetime.fromtimestamp(now).date()
+        try:
+            rows = self.datalogger.load(
+                today - datetime.timedelta(days=1), today
+            )
+        except Exception as exc:  # such as a database still locked
+            logger.error("statistics start empty: %s", exc)
+            return
+        rows = rows[(rows[:, 0] > now - 86400) & (rows[:, 0] <= now)]
+        for t, rh, c in rows.tolist():
+            for name, reading in (("humidity", rh), ("temperature", c)):
+                for stats in self._statistics[name].values():
+                    stats.append(reading, t)
+        logger.info("statistics started from %d logged readings", len(rows))
 
-                t_raw = self.device.temperature
-                self._temperature = smooth(
-                    t_raw, self.smoothing, self._temperature
+    async def update_statistics(self, rh_raw, t_raw, t_sample):
+        """Update the running statistics PVs."""
+        for name, reading in (("humidity", rh_raw), ("temperature", t_raw)):
+            for period, stats in self._statistics[name].items():
+                stats.append(reading, t_sample)
+                for stat, value in (
+                    ("min", stats.minimum),
+                    ("max", stats.maximum),
+                    ("mean", stats.mean),
+                    ("stddev", stats.stddev),
+                ):
+                    await getattr(self, f"{name}_{period}_{stat}").write(
+                        value=value, timestamp=t_sample
+                    )
+            daily = self._statistics[name]["day"]
+            await getattr(self, f"{name}_day_registers").write(
+                value=daily.registers.to_array(), timestamp=t_sample
+            )
+
+    async def update_psychrometrics(self, rh_raw, t_raw, t_sample):
+        """Update the PVs derived from humidity and temperature."""
+        out_of_domain = not (
+            in_domain(self._humidity, self._temperature)
+            and in_domain(rh_raw, t_raw)
+        )
+        if out_of_domain != self.out_of_domain:
+            self.out_of_domain = out_of_domain
+            if out_of_domain:
+                logger.warning(
+                    "derived PVs invalid for RH=%.1f %%, T=%.1f C",
+                    rh_raw,
+                    t_raw,
                 )
-                self._temperature_trend.compute(t_raw)
-                await self.temperature_raw.write(value=t_raw)
-                await self.temperature_f_raw.write(value=C2F(t_raw))
-                await self.temperature.write(value=self._temperature)
-                await self.temperature_f.write(
-                    value=C2F(self._temperature)
+        alarm = {}
+        if out_of_domain:
+            # skip the limit check, which would clear the alarm
+            alarm = dict(
+                verify_value=False,
+                status=AlarmStatus.CALC,
+                severity=AlarmSeverity.INVALID_ALARM,
+            )
+        for suffix, values in (
+            ("", derive(self._humidity, self._temperature)),
+            ("_raw", derive(rh_raw, t_raw)),
+        ):
+            dew_point = float(values.dew_point)
+            heat_index = float(values.heat_index)
+            updates = [
+                ("vapor_pressure", float(values.vapor_pressure)),
+                ("dew_point", dew_point),
+                ("absolute_humidity", float(values.absolute_humidity)),
+                ("heat_index", heat_index),
+            ]
+            if self.fahrenheit:
+                updates += [
+                    ("dew_point_f", C2F(dew_point)),
+                    ("heat_index_f", C2F(heat_index)),
+                ]
+            for attr, value in updates:
+                await getattr(self, attr + suffix).write(
+                    value=value, timestamp=t_sample, **alarm
                 )
-                await self.temperature_trend.write(
-                    value=self._temperature_trend.slope
+
+    async def update_alarm(self):
+        """Raise (or clear) the alarm on the sensor PVs for stale data."""
+        t_sample = self.device.timestamp
+        if t_sample is None:  # no reading yet, stale from the start
+            t_sample = self._t_start
+        stale = (
+            t_sample is not None
+            and self.clock.time() - t_sample > self.stale_timeout
+        )
+        if stale != self.stale:
+            self.stale = stale
+            if stale:
+                logger.warning(
+                    "no new sensor reading in %.1f s", self.stale_timeout
                 )
+                status = AlarmStatus.TIMEOUT
+                severity = AlarmSeverity.INVALID_ALARM
+            else:
+                status = AlarmStatus.NO_ALARM
+                severity = AlarmSeverity.NO_ALARM
+            await self.alarms["sensor"].write(
+                status=status, severity=severity
+            )
+            if self.psychrometrics:
+                await self.update_derived_alarm()
 
-                # assumes same keys for humidity & temperature trends
-                arr = [
-                    self._temperature_trend.cache[factor]
-                    for factor in keys
-                ]
-                await self.temperature_trend_array.write(value=arr)
+    async def update_derived_alarm(self):
+        """Raise (or clear) the alarm on the derived PVs."""
+        if self.stale:
+            status = AlarmStatus.TIMEOUT
+            severity = AlarmSeverity.INVALID_ALARM
+        elif self.out_of_domain:
+            status = AlarmStatus.CALC
+            severity = AlarmSeverity.INVALID_ALARM
+        else:
+            status = AlarmStatus.NO_ALARM
+            severity = AlarmSeverity.NO_ALARM
+        await self.alarms["psychrometrics"].write(
+            status=status, severity=severity
+        )
 
-                await self.counter.write(value=self.counter.value + 1)
+    async def update_health(self):
+        """Update the PVs that describe the update loop."""
+        health = self.health
+        await self.loop_duration.write(value=health.cycle_duration)
+        await self.loop_jitter.write(value=health.jitter)
+        if health.overruns != self.loop_overruns.value:
+            await self.loop_overruns.write(value=health.overruns)
+        await self.logger_latency.write(value=health.logger_latency)
+        if self.device.timestamp is not None:
+            await self.data_age.write(
+                value=self.clock.time() - self.device.timestamp
+            )
+        if health.histogram is not None:
+            await self.loop_histogram.write(value=health.histogram)
 
-                self.datalogger.record(rh_raw, t_raw)
 
-            while time.time() < t_next_read:
-                await async_lib.library.sleep(INNER_LOOP_SLEEP)
+def _date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
 
 
 def main():
     """Entry point for command-line program."""
-    from .reader import DHT_sensor, PIN, READ_PERIOD
-    import datetime
-
-    ioc_options, run_options = ioc_arg_parser(
+    parser, split_args = template_arg_parser(
         default_prefix="dht:", desc=dedent(DHT_IOC.__doc__)
     )
+    parser.add_argument(
+        "--loop-histogram",
+        action="store_true",
+        help="Accumulate a histogram of update cycle durations.",
+    )
+    parser.add_argument(
+        "--no-fahrenheit",
+        action="store_true",
+        help="Do not provide PVs in F units.",
+    )
+    parser.add_argument(
+        "--no-trend-arrays",
+        action="store_true",
+        help="Do not provide the trend array PVs.",
+    )
+    parser.add_argument(
+        "--no-psychrometrics",
+        action="store_true",
+        help="Do not provide dew point, heat index, ... PVs.",
+    )
+    parser.add_argument(
+        "--no-rates",
+        action="store_true",
+        help="Do not provide the rate of change PVs.",
+    )
+    parser.add_argument(
+        "--rate-windows",
+        type=float,
+        nargs=3,
+        default=RATE_WINDOWS,
+        metavar=("SHORT", "MEDIUM", "LONG"),
+        help=(
+            "Lengths (s) of the rate of change windows"
+            f" (default: {' '.join(f'{w:g}' for w in RATE_WINDOWS)})."
+        ),
+    )
+    parser.add_argument(
+        "--no-statistics",
+        action="store_true",
+        help="Do not provide the daily and 24 hour statistics PVs.",
+    )
+    parser.add_argument(
+        "--stale-timeout",
+        type=float,
+        default=STALE_TIMEOUT,
+        help=(
+            "Mark sensor PVs INVALID after this many seconds"
+            f" without a new reading (default: {STALE_TIMEOUT})."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on this TCP port (default: off).",
+    )
+    parser.add_argument(
+        "--metrics-host",
+        default="0.0.0.0",
+        help="Interface for the metrics endpoint (default: all).",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices="DEBUG INFO WARNING ERROR CRITICAL".split(),
+        help="Lowest level of dhtioc messages to log (default: INFO).",
+    )
+    parser.add_argument(
+        "--simulate",
+        action="store_true",
+        help="Use a simulated sensor (no hardware, no data files).",
+    )
+    parser.add_argument(
+        "--report-period",
+        type=float,
+        default=REPORT_PERIOD,
+        help=(
+            "Update the PVs at this interval, s"
+            f" (default: {REPORT_PERIOD}, no faster with the sensor)."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help=(
+            "Profile the IOC for this long after it starts"
+            " (later: write the profile PV or send SIGUSR1)."
+        ),
+    )
+    parser.add_argument(
+        "--log-db",
+        default=None,
+        help="Record readings in this SQLite database, not in data files.",
+    )
+    parser.add_argument(
+        "--log-batch",
+        type=float,
+        nargs=2,
+        default=None,
+        metavar=("SIZE", "SECONDS"),
+        help=(
+            "Write the readings after SIZE readings or SECONDS"
+            " (default: 1 60, with --log-db: 30 60)."
+        ),
+    )
+    parser.add_argument(
+        "--log-durability",
+        default="none",
+        choices=DURABILITY,
+        help=(
+            "Save the readings to storage (fsync): when the system"
+            " chooses, every --fsync-interval, or after each batch"
+            " (default: none)."
+        ),
+    )
+    parser.add_argument(
+        "--fsync-interval",
+        type=float,
+        default=FSYNC_INTERVAL,
+        help=(
+            "With --log-durability periodic, save the readings"
+            f" at least this often, s (default: {FSYNC_INTERVAL:g})."
+        ),
+    )
+    parser.add_argument(
+        "--replay",
+        type=_date,
+        nargs="+",
+        default=None,
+        metavar=("START", "END"),
+        help=(
+            "Replay the data logged from START to END (YYYY-MM-DD,"
+            " default END: START) instead of reading the sensor."
+        ),
+    )
+    parser.add_argument(
+        "--replay-path",
+        default=None,
+        help="Base directory of the data files to replay.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=0,
+        help=(
+            "Replay at this multiple of real time"
+            " (default: 0, as fast as possible)."
+        ),
+    )
+    parser.add_argument(
+        "--replay-log-path",
+        default=None,
+        help="Record replayed readings under this directory (default: off).",
+    )
+    args = parser.parse_args()
+    ioc_options, run_options = split_args(args)
+    setup_logging(args.log_level)
+
+    source_options = {}
+    if args.replay is not None:
+        from .replay import ReplaySensor
+
+        if len(args.replay) > 2:
+            parser.error("--replay takes a START and an optional END date")
+        source = DataLogger(ioc_options["prefix"], path=args.replay_path)
+        data = source.load(*args.replay)
+        if len(data) == 0:
+            parser.error(f"no data to replay in {source.base_path}")
+        clock = VirtualClock(data[0, 0], speed=args.speed)
+        sensor = ReplaySensor(data, clock)
+        source_options = dict(
+            clock=clock,
+            log_path=args.replay_log_path,
+            log_data=args.replay_log_path is not None,
+            exit_when_finished=True,
+        )
+        print(f"replay: {len(data)} readings at speed {args.speed or 'max'}")
+    elif args.simulate:
+        from .simulator import SimulatedSensor
+
+        sensor = SimulatedSensor(period=args.report_period)
+        source_options = dict(log_data=False)  # keep the data files real
+    else:
+        from .reader import DHT_sensor, PIN, READ_PERIOD
 
-    print(f"PIN: {PIN}")
-    print(f"READ_PERIOD: {READ_PERIOD}")
+        print(f"PIN: {PIN}")
+        print(f"READ_PERIOD: {READ_PERIOD}")
 
-    sensor = DHT_sensor(PIN, READ_PERIOD)
+        sensor = DHT_sensor(PIN, READ_PERIOD)
+
+    log_options = dict(
+        durability=args.log_durability, fsync_interval=args.fsync_interval
+    )
+    if args.log_batch is not None:
+        log_options["batch_size"] = int(args.log_batch[0])
+        log_options["batch_interval"] = args.log_batch[1]
+
+    metrics = None
+    if args.metrics_port is not None:
+        metrics = MetricsExporter(
+            ioc_options["prefix"],
+            port=args.metrics_port,
+            host=args.metrics_host,
+        )
     server = DHT_IOC(
-        sensor=sensor, report_period=REPORT_PERIOD, **ioc_options
+        sensor=sensor,
+        report_period=args.report_period,
+        loop_histogram=args.loop_histogram,
+        metrics=metrics,
+        stale_timeout=args.stale_timeout,
+        fahrenheit=not args.no_fahrenheit,
+        trend_arrays=not args.no_trend_arrays,
+        psychrometrics=not args.no_psychrometrics,
+        rates=not args.no_rates,
+        rate_windows=args.rate_windows,
+        statistics=not args.no_statistics,
+        log_db=args.log_db,
+        log_options=log_options,
+        **source_options,
+        **ioc_options,
     )
 
+    if args.profile:
+        server.start_profile(args.profile)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(
+            signal.SIGUSR1,
+            lambda *_: server.start_profile(PROFILE_DURATION),
+        )
+
     atexit.register(sensor.terminate_background_thread, server)
     run_ioc(server.pvdb, **run_options)
 
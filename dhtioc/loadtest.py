@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+"""
+Load test: many Channel Access clients monitoring one IOC.
+
+.. autosummary::
+    ~Client
+    ~load_step
+    ~main
+    ~pv_names
+
+Each client is a separate caproto (asyncio) client context, with
+its own connection (circuit) to the IOC, that subscribes to all
+of the ``DHT_IOC`` PVs.  The number of clients is raised in steps.
+For each step, the report gives:
+
+=============  =========================================================
+column         meaning
+=============  =========================================================
+clients        number of clients
+updates/s      monitor updates received, all clients and PVs
+latency        time (ms) from when the IOC posted a PV to when the
+               client received it: median, 99th percentile, largest
+dropped        updates of the ``counter`` PV that were never received
+jitter         how late (ms) the IOC update loop woke: mean, largest
+overruns       update cycles that ran past their schedule
+=============  =========================================================
+
+The latency is measured with the PVs time stamped when they are
+posted (``loop_duration``, ``loop_jitter``), since the sensor PVs
+are time stamped by the sensor reading.  The clients run in this
+one process, so with many clients, this process can become the
+limit; run more instances of the load test if so.
+
+EXAMPLE::
+
+    dhtioc_loadtest --spawn --clients 1 10 50 100 --duration 30
+"""
+
+import argparse
+import asyncio
+import numpy as np
+import os
+import subprocess
+import sys
+import time
+
+from caproto.asyncio.client import Context
+
+LATENCY_PVS = "loop_duration loop_jitter".split()
+SPAWN_PREFIX = "dhtioc_loadtest:"
+
+
+def pv_names(prefix):
+    """Return ``{attribute: PV name}`` of all the ``DHT_IOC`` PVs."""
+    from .ioc import DHT_IOC
+
+    return {
+        attr: prefix + prop.pvspec.name for attr, prop in DHT_IOC._pvs_.items()
+    }
+
+
+class Client:
+    """
+    One Channel Access client, monitoring all the PVs.
+
+    PARAMETERS
+
+    names
+        *dict* :
+        ``{attribute: PV name}``, from :func:`pv_names`.
+
+    .. autosummary::
+        ~connect
+        ~disconnect
+        ~on_update
+        ~reset
+    """
+
+    def __init__(self, names):
+        """Constructor."""
+        self.attrs = {name: attr for attr, name in names.items()}
+        # caproto 1.3 cannot share a broadcaster between contexts
+        # that connect the same PVs, so each client has its own
+        self.context = Context()
+        self.subscriptions = []
+        self.connected = 0
+        self.reset()
+
+    def reset(self):
+        """Start a new measurement."""
+        self.updates = 0
+        self.latencies = []
+        self.jitters = []
+        self.overruns = []
+        self.dropped = 0
+        self.counter = None
+
+    async def connect(self, timeout=5.0):
+        """
+        Connect and subscribe to each PV that the IOC serves.
+
+        The PVs connect concurrently, so the optional PVs that the
+        IOC does not serve cost one ``timeout`` in all, not each.
+        """
+        pvs = await self.context.get_pvs(*self.attrs)
+        results = await asyncio.gather(
+            *[pv.wait_for_connection(timeout=timeout) for pv in pvs],
+            return_exceptions=True,
+        )
+        for pv, result in zip(pvs, results):
+            if isinstance(result, TimeoutError):  # optional, not served
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            self.connected += 1
+            sub = pv.subscribe(data_type="time")
+            sub.add_callback(self.on_update)
+            self.subscriptions.append(sub)
+
+    async def disconnect(self):
+        """Drop the subscriptions and the connection."""
+        for sub in self.subscriptions:
+            await sub.clear()
+        await self.context.disconnect()
+        await self.context.broadcaster.disconnect()
+
+    def on_update(self, sub, response):
+        """Receive one monitor update (called by caproto)."""
+        t = time.time()
+        self.updates += 1
+        attr = self.attrs[sub.pv.name]
+        if attr in LATENCY_PVS:
+            self.latencies.append(t - response.metadata.timestamp)
+        if attr == "loop_jitter":
+            self.jitters.append(response.data[0])
+        elif attr == "loop_overruns":
+            self.overruns.append(response.data[0])
+        elif attr == "counter":
+            value = response.data[0]
+            if self.counter is not None and value > self.counter + 1:
+                self.dropped += value - self.counter - 1
+            self.counter = value
+
+
+async def load_step(clients, duration):
+    """
+    Measure with all ``clients`` for ``duration`` seconds.
+
+    :return: the measures of this step (see the module documentation)
+    :rtype: dict
+    """
+    for client in clients:
+        client.reset()
+    await asyncio.sleep(duration)
+
+    latencies = np.concatenate([client.latencies for client in clients] + [[]])
+    jitters = clients[0].jitters or [0]
+    overruns = clients[0].overruns or [0]
+    result = dict(
+        clients=len(clients),
+        pvs=clients[0].connected,
+        rate=sum(client.updates for client in clients) / duration,
+        dropped=sum(client.dropped for client in clients),
+        jitter_mean=float(np.mean(jitters)),
+        jitter_max=float(np.max(jitters)),
+        overruns=int(overruns[-1] - overruns[0]),
+    )
+    if len(latencies) > 0:
+        result.update(
+            latency_median=float(np.median(latencies)),
+            latency_99=float(np.percentile(latencies, 99)),
+            latency_max=float(np.max(latencies)),
+        )
+    return result
+
+
+def _print_header():
+    print(
+        f"{'clients':>7} {'PVs':>4} {'updates/s':>9}"
+        f" {'latency ms (50% 99% max)':>26} {'dropped':>7}"
+        f" {'jitter ms (mean max)':>21} {'overruns':>8}"
+    )
+
+
+def _print_step(r):
+    nan = float("nan")
+    print(
+        f"{r['clients']:7d} {r['pvs']:4d} {r['rate']:9.0f}"
+        f" {r.get('latency_median', nan)*1e3:8.2f}"
+        f" {r.get('latency_99', nan)*1e3:8.2f}"
+        f" {r.get('latency_max', nan)*1e3:8.2f}"
+        f" {r['dropped']:7d}"
+        f" {r['jitter_mean']*1e3:10.2f} {r['jitter_max']*1e3:10.2f}"
+        f" {r['overruns']:8d}",
+        flush=True,
+    )
+
+
+async def load_test(prefix, steps, duration, settle=2.0):
+    """Add clients, step by step, and report each step."""
+    names = pv_names(prefix)
+    clients = []
+    results = []
+    _print_header()
+    try:
+        for n in steps:
+            new = [Client(names) for _ in range(n - len(clients))]
+            await asyncio.gather(*[client.connect() for client in new])
+            clients += new
+            if clients[0].connected == 0:
+                raise RuntimeError(f"no PVs found with prefix {prefix!r}")
+            await asyncio.sleep(settle)  # initial updates, not measured
+            results.append(await load_step(clients, duration))
+            _print_step(results[-1])
+    finally:
+        for client in clients:
+            await client.disconnect()
+    return results
+
+
+def main():
+    """Entry point for command-line program."""
+    parser = argparse.ArgumentParser(
+        description="Load test a dhtioc IOC with many CA clients."
+    )
+    parser.add_argument(
+        "--prefix",
+        default=None,
+        help=f"PV prefix of the IOC (default with --spawn: {SPAWN_PREFIX})",
+    )
+    parser.add_argument(
+        "--clients",
+        type=int,
+        nargs="+",
+        default=[1, 10, 50, 100],
+        help="number of clients in each step",
+    )
+    parser.add_argument(
+        "--duration", type=float, default=30, help="seconds per step"
+    )
+    parser.add_argument(
+        "--spawn",
+        action="store_true",
+        help="start an IOC with the simulated sensor for the test",
+    )
+    parser.add_argument(
+        "--report-period",
+        type=float,
+        default=None,
+        help="update period (s) of the spawned IOC",
+    )
+    parser.add_argument(
+        "--ioc-log",
+        default=None,
+        help="write the output of the spawned IOC to this file",
+    )
+    args = parser.parse_args()
+    if sorted(args.clients) != args.clients or args.clients[0] < 1:
+        parser.error("--clients must be increasing and positive")
+    prefix = args.prefix or (SPAWN_PREFIX if args.spawn else None)
+    if prefix is None:
+        parser.error("--prefix is required (or use --spawn)")
+
+    # clients and IOC are on this host
+    os.environ.setdefault("EPICS_CA_AUTO_ADDR_LIST", "NO")
+    os.environ.setdefault("EPICS_CA_ADDR_LIST", "127.0.0.1")
+
+    ioc = None
+    if args.spawn:
+        command = [
+            sys.executable,
+            "-m",
+            "dhtioc.ioc",
+            "--simulate",
+            "--prefix",
+            prefix,
+            "--interfaces",
+            "127.0.0.1",
+        ]
+        if args.report_period is not None:
+            command += ["--report-period", str(args.report_period)]
+        output = subprocess.DEVNULL
+        if args.ioc_log is not None:
+            output = open(args.ioc_log, "w")
+        ioc = subprocess.Popen(command, stdout=output, stderr=output)
+        time.sleep(3)  # time to start serving
+    try:
+        # not asyncio.run(), new in Python 3.7
+        asyncio.get_event_loop().run_until_complete(
+            load_test(prefix, args.clients, args.duration)
+        )
+    finally:
+        if ioc is not None:
+            ioc.terminate()
+            ioc.wait()
+            if args.ioc_log is not None:
+                output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Logging that stays out of the way of the update loop.
+
+.. autosummary::
+    ~RateLimitFilter
+    ~setup_logging
+
+Log records are formatted (so they show the values at the time
+of the call) and put on a queue by the thread that logs them (the
+asyncio loop, the sensor reader, ...), then written by a
+:class:`~logging.handlers.QueueListener` thread.  A
+:class:`RateLimitFilter` drops repeats of the same warning (such
+as a write error every 2 s when the disk is full) before they are
+formatted.
+"""
+
+__all__ = "RateLimitFilter setup_logging".split()
+
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+REPEAT_INTERVAL = 60.0  # s, pass the same message at most this often
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Pass a repeated warning or error at most once per ``interval``.
+
+    Records are the same when they have the same logger, level,
+    message (before its arguments are inserted), text arguments
+    (such as a file name), and type of exception.  So a message
+    with a changing number (such as the time) is still a repeat,
+    while the same message about another file is not.  When a
+    repeat is passed, the number of repeats that were dropped is
+    added to its message.  Records below ``level`` always pass.
+
+    PARAMETERS
+
+    interval
+        *float* :
+        Pass the same message at most this often, s.
+        (default: 60)
+    level
+        *int* :
+        Lowest level to limit.
+        (default: ``logging.WARNING``)
+    """
+
+    def __init__(self, interval=REPEAT_INTERVAL, level=logging.WARNING):
+        """Constructor."""
+        super().__init__()
+        self.interval = interval
+        self.level = level
+        self._seen = {}  # key: [time passed, repeats dropped]
+        self._lock = threading.Lock()  # records come from many threads
+
+    @staticmethod
+    def _key(record):
+        args = record.args if isinstance(record.args, tuple) else ()
+        texts = tuple(arg for arg in args if isinstance(arg, str))
+        exceptions = tuple(
+            type(arg) for arg in args if isinstance(arg, BaseException)
+        )
+        if record.exc_info:
+            exceptions += (record.exc_info[0],)
+        return (
+            record.name,
+            record.levelno,
+            str(record.msg),
+            texts,
+            exceptions,
+        )
+
+    def filter(self, record):
+        """Return ``False`` to drop this record."""
+        if record.levelno < self.level and not record.exc_info:
+            return True
+        key = self._key(record)
+        t = time.monotonic()
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is None:
+                if len(self._seen) > 1000:  # forget the old messages
+                    self._seen = {
+                        k: v
+                        for k, v in self._seen.items()
+                        if t - v[0] < self.interval
+                    }
+                self._seen[key] = [t, 0]
+                return True
+            if t - seen[0] < self.interval:
+                seen[1] += 1
+                return False
+            repeats = seen[1]
+            self._seen[key] = [t, 0]
+        if repeats > 0:
+            record.msg = f"{record.msg} (repeated {repeats} times)"
+        return True
+
+
+def setup_logging(
+    level=logging.INFO,
+    handler=None,
+    interval=REPEAT_INTERVAL,
+    name="dhtioc",
+):
+    """
+    Send the log records of ``name`` through a queue to ``handler``.
+
+    PARAMETERS
+
+    level
+        *int* or *str* :
+        Lowest level to log.
+        (default: ``logging.INFO``)
+    handler
+        *obj* :
+        Instance of ``logging.Handler`` that writes the records.
+        (default: a ``StreamHandler`` to stderr)
+    interval
+        *float* :
+        Pass the same message at most this often, s.
+        (default: 60)
+    name
+        *str* :
+        Logger to configure.
+        (default: ``"dhtioc"``, all loggers of this package)
+
+    :return: the listener (already started, stopped at exit)
+    :rtype: logging.handlers.QueueListener
+    """
+    if handler is None:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    records = queue.Queue()  # not SimpleQueue, new in Python 3.7
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter(interval))
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(records, handler)
+    listener.start()
+    atexit.register(_stop, listener)
+    return listener
+
+
+def _stop(listener):
+    """Write the queued records and stop, unless already stopped."""
+    if getattr(listener, "_thread", None) is not None:
+        listener.stop()
@@ -0,0 +1,189 @@
+"""
+Serve IOC metrics in the Prometheus (OpenMetrics) text format.
+
+.. autosummary::
+    ~MetricsExporter
+
+The HTTP server runs in the same asyncio event loop as the
+caproto server.  The text is rendered only when a scrape
+arrives after the values have changed, so frequent scrapes
+only copy cached bytes to the socket.
+"""
+
+__all__ = [
+    "MetricsExporter",
+]
+
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+REQUEST_TIMEOUT = 5.0  # s, give up on a slow client
+
+# (name, type, help) in the order of the values from MetricsExporter.collect
+METRICS = (
+    ("dhtioc_humidity_percent", "gauge", "relative humidity, smoothed"),
+    ("dhtioc_humidity_raw_percent", "gauge", "relative humidity, raw"),
+    ("dhtioc_humidity_trend", "gauge", "trend in relative humidity"),
+    ("dhtioc_temperature_celsius", "gauge", "temperature, smoothed"),
+    ("dhtioc_temperature_raw_celsius", "gauge", "temperature, raw"),
+    ("dhtioc_temperature_trend", "gauge", "trend in temperature"),
+    ("dhtioc_updates_total", "counter", "PV update cycles with new data"),
+    ("dhtioc_sensor_reads_total", "counter", "successful sensor reads"),
+    ("dhtioc_sensor_errors_total", "counter", "failed sensor reads"),
+    ("dhtioc_data_age_seconds", "gauge", "time since last sensor reading"),
+    ("dhtioc_loop_duration_seconds", "gauge", "most recent cycle duration"),
+    ("dhtioc_loop_jitter_seconds", "gauge", "most recent cycle wake delay"),
+    ("dhtioc_loop_overruns_total", "counter", "cycles past their schedule"),
+    ("dhtioc_logger_latency_seconds", "gauge", "most recent log write time"),
+    ("dhtioc_logger_queue_depth", "gauge", "records waiting to be logged"),
+)
+
+
+class MetricsExporter:
+    """
+    Lightweight HTTP endpoint with the IOC metrics.
+
+    PARAMETERS
+
+    ioc_prefix
+        *str* :
+        EPICS IOC prefix, used as the ``ioc`` label.
+    port
+        *int* :
+        TCP port to listen on.
+    host
+        *str* :
+        Interface to listen on.
+        (default: all interfaces)
+
+    .. autosummary::
+        ~collect
+        ~render
+        ~start
+        ~stop
+        ~update
+    """
+
+    def __init__(self, ioc_prefix, port, host="0.0.0.0"):
+        """Constructor."""
+        self.prefix = ioc_prefix
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self.server = None
+
+        label = '{ioc="%s"}' % ioc_prefix.replace('"', '\\"')
+        lines = []
+        for name, kind, text in METRICS:
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name}{label} %s")
+        self._template = "\n".join(lines) + "\n"
+        self._values = None
+        self._body = None
+
+    def collect(self, ioc):
+        """
+        Return the metric values from ``ioc`` (a ``DHT_IOC``).
+
+        Values not yet known are ``None``.
+        """
+        device = ioc.device
+        health = ioc.health
+        age = None
+        if device.timestamp is not None:
+            age = round(ioc.data_age.value, 3)
+        return (
+            ioc._humidity,
+            device.humidity,
+            ioc._humidity_trend.slope,
+            ioc._temperature,
+            device.temperature,
+            ioc._temperature_trend.slope,
+            ioc.counter.value,
+            getattr(device, "read_count", None),
+            getattr(device, "error_count", None),
+            age,
+            round(health.cycle_duration, 6),
+            round(health.jitter, 6),
+            health.overruns,
+            round(health.logger_latency, 6),
+            ioc.datalogger.pending,
+        )
+
+    def update(self, values):
+        """
+        Accept new metric values (in the order of ``METRICS``).
+
+        The cached text is discarded only if a value changed.
+        """
+        if values != self._values:
+            self._values = values
+            self._body = None
+
+    def render(self):
+        """Return the metrics text (as bytes), rendering only if needed."""
+        if self._body is None:
+            values = self._values or (None,) * len(METRICS)
+            text = self._template % tuple(
+                "NaN" if v is None else repr(v) for v in values
+            )
+            self._body = text.encode("utf8")
+        return self._body
+
+    async def start(self):
+        """Start serving (call from within the running asyncio loop)."""
+        self.server = await asyncio.start_server(
+            self._handle, self.host, self.port
+        )
+        logger.info(
+            "metrics served at http://%s:%d/metrics", self.host, self.port
+        )
+
+    async def stop(self):
+        """Stop serving."""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader, writer):
+        """Answer one HTTP request, then close the connection."""
+        try:
+            request = await asyncio.wait_for(
+                reader.readline(), REQUEST_TIMEOUT
+            )
+            while True:  # discard the request headers
+                line = await asyncio.wait_for(
+                    reader.readline(), REQUEST_TIMEOUT
+                )
+                if line in (b"\r\n", b"\n", b""):
+                    break
+            parts = request.split()
+            method = parts[0] if parts else b""
+            path = parts[1].split(b"?")[0] if len(parts) > 1 else b""
+            if method not in (b"GET", b"HEAD"):
+                status, body = b"405 Method Not Allowed", b""
+            elif path not in (b"/", b"/metrics"):
+                status, body = b"404 Not Found", b""
+            else:
+                status, body = b"200 OK", self.render()
+                self.scrapes += 1
+            writer.write(
+                b"HTTP/1.1 %s\r\n"
+                b"Content-Type: %s\r\n"
+                b"Content-Length: %d\r\n"
+                b"Connection: close\r\n"
+                b"\r\n"
+                % (status, CONTENT_TYPE.encode(), len(body))
+            )
+            if method != b"HEAD":
+                writer.write(body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as exc:
+            logger.debug("metrics request abandoned: %s", exc)
+        finally:
+            writer.close()
@@ -0,0 +1,134 @@
+"""
+Profile a running IOC by sampling the stacks of its threads.
+
+.. autosummary::
+    ~StackSampler
+
+While a profile runs, a background thread records the call
+stack of every other thread (the asyncio loop with the PV
+updates and data file writes, the sensor reader, ...) at a
+fixed interval.  The counts are written in the *collapsed
+stack* format, one line per distinct stack::
+
+    MainThread;run (events.py:78);...;_write (datalogger.py:390) 12
+
+which is read by flame graph tools such as ``flamegraph.pl``
+or https://www.speedscope.app.  Nothing runs (no overhead)
+when no profile is requested.
+"""
+
+__all__ = "StackSampler".split()
+
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+SAMPLE_INTERVAL = 0.005  # s
+
+
+class StackSampler:
+    """
+    Sample the stacks of all threads for a fixed duration.
+
+    PARAMETERS
+
+    interval
+        *float* :
+        Time between samples, s.
+        (default: 0.005)
+
+    .. autosummary::
+        ~running
+        ~sample
+        ~start
+        ~write
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        """Constructor."""
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._labels = {}  # code object: frame label
+        self._thread = None
+
+    @property
+    def running(self):
+        """Is a profile being taken now?"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, fname):
+        """
+        Sample for ``duration`` seconds, then write ``fname``.
+
+        The sampling runs in a background thread.  Return ``False``
+        (and do nothing) if a profile is already running.
+
+        PARAMETERS
+
+        duration
+            *float* :
+            Length of the profile, s.
+        fname
+            *str* :
+            Collapsed stack file to write.  Absolute path.
+        """
+        if self.running:
+            return False
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(duration, fname),
+            name="dhtioc profiler",
+            daemon=True,
+        )
+        self._thread.start()
+        return True
+
+    def _run(self, duration, fname):
+        logger.info("profiling for %g s", duration)
+        self.samples.clear()
+        t_end = time.monotonic() + duration
+        while time.monotonic() < t_end:
+            self.sample()
+            time.sleep(self.interval)
+        self.write(fname)
+        logger.info(
+            "profile (%d samples) written to %s",
+            sum(self.samples.values()),
+            fname,
+        )
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = (
+                f"{code.co_name}"
+                f" ({os.path.basename(code.co_filename)}"
+                f":{code.co_firstlineno})"
+            )
+            self._labels[code] = label
+        return label
+
+    def sample(self):
+        """Record the stack of each thread (but this one)."""
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, fname):
+        """Write the samples to ``fname``, in collapsed stack format."""
+        os.makedirs(os.path.dirname(fname), exist_ok=True)
+        with open(fname, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
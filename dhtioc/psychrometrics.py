@@ -0,0 +1,147 @@
+"""
+Quantities derived from relative humidity and temperature.
+
+.. autosummary::
+    ~absolute_humidity
+    ~derive
+    ~dew_point
+    ~heat_index
+    ~in_domain
+    ~saturation_vapor_pressure
+    ~vapor_pressure
+
+All functions accept either scalars or NumPy arrays (of the
+same shape), so logged histories can be converted in bulk::
+
+    rh, t = numpy.loadtxt(fname, usecols=(1, 2), unpack=True)
+    td = dew_point(rh, t)
+
+Temperatures are in C, relative humidity in %, pressures in hPa.
+At 0 %RH (no water vapor) the dew point is that of a tiny vapor
+pressure, ``VAPOR_PRESSURE_MIN``, not NaN.  Use :func:`in_domain`
+to find the readings the results are meaningful for.
+"""
+
+__all__ = """
+    absolute_humidity
+    derive
+    Derived
+    dew_point
+    heat_index
+    in_domain
+    saturation_vapor_pressure
+    vapor_pressure
+""".split()
+
+from collections import namedtuple
+import numpy as np
+
+from .utils import C2F
+
+# Magnus formula coefficients over water (Alduchov & Eskridge, 1996)
+MAGNUS_A = 17.625
+MAGNUS_B = 243.04  # C
+MAGNUS_C = 6.1094  # hPa
+VAPOR_PRESSURE_MIN = 1e-6  # hPa, dew point (about -114 C) of drier air
+
+# water vapor density: M_w / R = 18.01528 g/mol / 8.314463 J/(mol K)
+VAPOR_DENSITY_FACTOR = 100 * 18.01528 / 8.314463  # g K / (hPa m^3)
+KELVIN = 273.15
+
+Derived = namedtuple(
+    "Derived", "vapor_pressure dew_point absolute_humidity heat_index"
+)
+
+
+def saturation_vapor_pressure(celsius):
+    """Saturation vapor pressure (hPa) over water at ``celsius``."""
+    return MAGNUS_C * np.exp(MAGNUS_A * celsius / (MAGNUS_B + celsius))
+
+
+def vapor_pressure(rh, celsius):
+    """Partial pressure (hPa) of water vapor."""
+    return rh / 100 * saturation_vapor_pressure(celsius)
+
+
+def _dew_point(e):
+    """Dew point (C) from vapor pressure (hPa)."""
+    gamma = np.log(np.maximum(e, VAPOR_PRESSURE_MIN) / MAGNUS_C)
+    return MAGNUS_B * gamma / (MAGNUS_A - gamma)
+
+
+def in_domain(rh, celsius):
+    """
+    Are the derived quantities meaningful for these readings?
+
+    Relative humidity must be above 0 and at most 100 %, and the
+    temperature above the pole of the Magnus formula.
+    """
+    rh = np.asarray(rh, dtype=float)
+    return (rh > 0) & (rh <= 100) & (np.asarray(celsius) > -MAGNUS_B)
+
+
+def _absolute_humidity(e, celsius):
+    """Water vapor density (g/m^3) from vapor pressure (hPa)."""
+    return VAPOR_DENSITY_FACTOR * e / (celsius + KELVIN)
+
+
+def dew_point(rh, celsius):
+    """Dew point (C)."""
+    return _dew_point(vapor_pressure(rh, celsius))
+
+
+def absolute_humidity(rh, celsius):
+    """Absolute humidity (water vapor density), g/m^3."""
+    return _absolute_humidity(vapor_pressure(rh, celsius), celsius)
+
+
+def heat_index(rh, celsius):
+    """
+    Heat index (C), as computed by the US National Weather Service.
+
+    :see: https://www.wpc.ncep.noaa.gov/html/heatindex_equation.shtml
+    """
+    t = C2F(np.asarray(celsius, dtype=float))
+    rh = np.asarray(rh, dtype=float)
+    simple = 0.5 * (t + 61 + (t - 68) * 1.2 + rh * 0.094)
+    full = (
+        -42.379
+        + 2.04901523 * t
+        + 10.14333127 * rh
+        - 0.22475541 * t * rh
+        - 6.83783e-3 * t * t
+        - 5.481717e-2 * rh * rh
+        + 1.22874e-3 * t * t * rh
+        + 8.5282e-4 * t * rh * rh
+        - 1.99e-6 * t * t * rh * rh
+    )
+    dry = (rh < 13) & (t >= 80) & (t <= 112)
+    full -= np.where(
+        dry,
+        (13 - rh) / 4 * np.sqrt(np.clip(17 - abs(t - 95), 0, None) / 17),
+        0,
+    )
+    humid = (rh > 85) & (t >= 80) & (t <= 87)
+    full += np.where(humid, (rh - 85) / 10 * (87 - t) / 5, 0)
+    hi = np.where((simple + t) / 2 < 80, simple, full)
+    result = (hi - 32) * 5 / 9
+    if result.ndim == 0:
+        return float(result)
+    return result
+
+
+def derive(rh, celsius):
+    """
+    Compute all derived quantities at once, sharing intermediate terms.
+
+    :return: vapor pressure (hPa), dew point (C),
+        absolute humidity (g/m^3), and heat index (C)
+    :rtype: Derived
+    """
+    e = vapor_pressure(rh, celsius)
+    return Derived(
+        e,
+        _dew_point(e),
+        _absolute_humidity(e, celsius),
+        heat_index(rh, celsius),
+    )
@@ -33,6 +33,10 @@ class DHT_sensor:
         ~ready
         ~terminate_background_thread
 
+    ``timestamp`` is the time (``time.time()``) of the
+    most recent successful reading, ``None`` until then.
+    ``read_count`` and ``error_count`` count the successful
+    and failed readings.
     """
 
     def __init__(self, pin, period):
@@ -54,6 +58,9 @@ class DHT_sensor:
         self.period = period
         self.temperature = None
         self.humidity = None
+        self.timestamp = None
+        self.read_count = 0
+        self.error_count = 0
         self.t0 = time.time()
         self.run_permitted = True
         atexit.register(self.terminate_background_thread)
@@ -74,9 +81,12 @@ class DHT_sensor:
         try:
             self.temperature = self.sensor.temperature
             self.humidity = self.sensor.humidity
-            logger.info(f"{time.time()-self.t0:.2f} {self}")
+            self.timestamp = time.time()
+            self.read_count += 1
+            logger.debug("%.2f %s", self.timestamp - self.t0, self)
         except Exception as exc:  # be prepared, it happens too much
-            logger.debug(f"{time.time()-self.t0:.2f} {exc}")
+            self.error_count += 1
+            logger.debug("%.2f %s", time.time() - self.t0, exc)
 
     @run_in_thread
     def read_in_background_thread(self):
@@ -0,0 +1,106 @@
+"""
+Replay logged data through the IOC.
+
+.. autosummary::
+    ~ReplaySensor
+
+Feed days of logged readings through a real ``DHT_IOC`` in
+seconds, to check the alarms, trends, and statistics against
+known history, or to exercise Channel Access clients and the
+archiver at a high rate::
+
+    dhtioc --replay 2020-11-01 2020-11-07 --speed 1000
+
+The IOC runs on a :class:`~dhtioc.clock.VirtualClock` that
+starts with the first logged reading.
+"""
+
+__all__ = "ReplaySensor".split()
+
+import numpy as np
+
+
+class ReplaySensor:
+    """
+    Stands in for :class:`~dhtioc.reader.DHT_sensor`, with logged readings.
+
+    At any (virtual) time, the sensor reports the most recent
+    logged reading, just as the real sensor would have.  Reading
+    ``timestamp`` (or ``ready``) moves to that reading, so the
+    ``humidity`` and ``temperature`` that follow belong to it.
+
+    PARAMETERS
+
+    data
+        *numpy.ndarray* :
+        (time, RH, T) rows, in time order, such as from
+        :meth:`~dhtioc.datalogger.DataLogger.load`.
+    clock
+        *obj* :
+        Instance of :class:`~dhtioc.clock.VirtualClock`.
+
+    .. autosummary::
+        ~finished
+        ~ready
+        ~terminate_background_thread
+    """
+
+    def __init__(self, data, clock):
+        """Constructor."""
+        data = np.asarray(data, dtype=float).reshape(-1, 3)
+        self.times = data[:, 0]
+        self.humidities = data[:, 1].tolist()
+        self.temperatures = data[:, 2].tolist()
+        self.clock = clock
+        self.error_count = 0
+        self._row = -1
+
+    def _sync(self):
+        """Move to the most recent row at the clock's time."""
+        t = self.clock.time()
+        row = self._row
+        times = self.times
+        if row + 1 < len(times) and times[row + 1] <= t:
+            if row + 2 < len(times) and times[row + 2] <= t:
+                # skipped ahead, search for the row
+                row = int(np.searchsorted(times, t, side="right")) - 1
+            else:
+                row += 1
+            self._row = row
+        return row
+
+    @property
+    def humidity(self):
+        """Relative humidity (%), ``None`` before the first reading."""
+        row = self._row
+        return None if row < 0 else self.humidities[row]
+
+    @property
+    def temperature(self):
+        """Temperature (C), ``None`` before the first reading."""
+        row = self._row
+        return None if row < 0 else self.temperatures[row]
+
+    @property
+    def timestamp(self):
+        """Time of the most recent reading, ``None`` before the first."""
+        row = self._sync()
+        return None if row < 0 else float(self.times[row])
+
+    @property
+    def read_count(self):
+        """Number of readings replayed so far."""
+        return self._sync() + 1
+
+    @property
+    def ready(self):
+        """Has a value been read for both humidity and temperature?"""
+        return self._sync() >= 0
+
+    @property
+    def finished(self):
+        """Have all the readings been replayed?"""
+        return self._sync() == len(self.times) - 1
+
+    def terminate_background_thread(self, *args, **kwargs):
+        """Nothing to stop, there is no background thread."""
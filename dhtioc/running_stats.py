@@ -0,0 +1,155 @@
+"""
+Running statistics of a signal, updated in constant time per reading.
+
+.. autosummary::
+    ~DailyStats
+    ~RollingStats
+
+"""
+
+__all__ = "DailyStats RollingStats".split()
+
+import collections
+import datetime
+
+from .StatsReg import StatsRegClass, WindowedRegression
+
+
+class DailyStats:
+    """
+    Minimum, maximum, mean, and standard deviation over the current day.
+
+    The statistics restart at local midnight, the same boundary
+    where :meth:`~dhtioc.datalogger.DataLogger.get_daily_file`
+    starts a new file.  The statistics registers (*x*: seconds
+    since midnight, *y*: reading) are available for aggregation
+    (see :meth:`~dhtioc.StatsReg.StatsRegClass.merge`).
+
+    .. autosummary::
+        ~append
+        ~mean
+        ~stddev
+    """
+
+    def __init__(self):
+        """Constructor."""
+        self.registers = StatsRegClass()
+        self.day = None
+        self.minimum = None
+        self.maximum = None
+        self._midnight = None
+
+    def append(self, reading, timestamp):
+        """
+        Add a new reading.
+
+        PARAMETERS
+
+        reading
+            *float* :
+            Signal value.
+        timestamp
+            *float* :
+            Time (``time.time()``) of the reading.
+        """
+        dt = datetime.datetime.fromtimestamp(timestamp)
+        if dt.date() != self.day:
+            self.day = dt.date()
+            self._midnight = datetime.datetime(
+                dt.year, dt.month, dt.day
+            ).timestamp()
+            self.registers.Clear()
+            self.minimum = self.maximum = reading
+        self.minimum = min(self.minimum, reading)
+        self.maximum = max(self.maximum, reading)
+        self.registers.Add(timestamp - self._midnight, reading)
+
+    @property
+    def mean(self):
+        """Mean of the readings today."""
+        return self.registers.Mean()[1]
+
+    @property
+    def stddev(self):
+        """Standard deviation of the readings today."""
+        return self.registers.StdDev()[1]
+
+
+class RollingStats:
+    """
+    Minimum, maximum, mean, and standard deviation over a moving window.
+
+    Minimum and maximum come from monotonic queues, mean and
+    standard deviation from a :class:`~dhtioc.StatsReg.WindowedRegression`.
+    Each reading costs constant time (amortized).
+
+    PARAMETERS
+
+    window
+        *float* :
+        Length of the window, s.
+        (default: 24 hours)
+
+    .. autosummary::
+        ~append
+        ~maximum
+        ~mean
+        ~minimum
+        ~stddev
+    """
+
+    def __init__(self, window=86400.0):
+        """Constructor."""
+        self.window = window
+        self.regression = WindowedRegression(window=window)
+        self._minima = collections.deque()  # (time, reading), increasing
+        self._maxima = collections.deque()  # (time, reading), decreasing
+
+    def append(self, reading, timestamp):
+        """
+        Add a new reading.
+
+        PARAMETERS
+
+        reading
+            *float* :
+            Signal value.
+        timestamp
+            *float* :
+            Time (``time.time()``) of the reading.
+        """
+        self.regression.Append(timestamp, reading)
+
+        minima = self._minima
+        while minima and minima[-1][1] >= reading:
+            minima.pop()
+        minima.append((timestamp, reading))
+        while timestamp - minima[0][0] > self.window:
+            minima.popleft()
+
+        maxima = self._maxima
+        while maxima and maxima[-1][1] <= reading:
+            maxima.pop()
+        maxima.append((timestamp, reading))
+        while timestamp - maxima[0][0] > self.window:
+            maxima.popleft()
+
+    @property
+    def minimum(self):
+        """Smallest reading in the window."""
+        return self._minima[0][1] if self._minima else None
+
+    @property
+    def maximum(self):
+        """Largest reading in the window."""
+        return self._maxima[0][1] if self._maxima else None
+
+    @property
+    def mean(self):
+        """Mean of the readings in the window."""
+        return self.regression.Mean()[1]
+
+    @property
+    def stddev(self):
+        """Standard deviation of the readings in the window."""
+        return self.regression.StdDev()[1]
@@ -0,0 +1,126 @@
+"""
+Simulated sensor, for development without the hardware.
+
+.. autosummary::
+    ~SimulatedSensor
+
+"""
+
+__all__ = "SimulatedSensor".split()
+
+import atexit
+import logging
+import random
+import time
+
+from .utils import run_in_thread
+
+logger = logging.getLogger(__name__)
+LOOP_SLEEP = 0.02
+READ_PERIOD = 2.0
+
+
+class SimulatedSensor:
+    """
+    Stands in for :class:`~dhtioc.reader.DHT_sensor`.
+
+    Readings are a random walk about the starting values,
+    pulled gently back toward them.  Provides the same
+    attributes, properties, and methods as the real sensor.
+
+    PARAMETERS
+
+    period
+        *float* :
+        Make a new reading every ``period`` seconds.
+        (default: 2.0)
+    humidity
+        *float* :
+        Mean relative humidity, %.
+        (default: 50)
+    temperature
+        *float* :
+        Mean temperature, C.
+        (default: 20)
+    seed
+        *int* :
+        Seed for the random numbers, so that runs are reproducible.
+        (default: ``None``)
+    background
+        *bool* :
+        Read in a background thread (like the real sensor).
+        When ``False``, call :meth:`read` for each new reading.
+        (default: ``True``)
+
+    .. autosummary::
+        ~read
+        ~read_in_background_thread
+        ~ready
+        ~terminate_background_thread
+    """
+
+    def __init__(
+        self,
+        period=READ_PERIOD,
+        humidity=50.0,
+        temperature=20.0,
+        seed=None,
+        background=True,
+    ):
+        """Constructor."""
+        self.period = period
+        self.mean_humidity = humidity
+        self.mean_temperature = temperature
+        self.rng = random.Random(seed)
+        self.humidity = None
+        self.temperature = None
+        self.timestamp = None
+        self.read_count = 0
+        self.error_count = 0
+        self.run_permitted = background
+        if background:
+            atexit.register(self.terminate_background_thread)
+            self.read_in_background_thread()
+
+    def __str__(self):
+        """Default string."""
+        if self.ready:
+            return f"RH={self.humidity:.1f}% T={self.temperature:.1f}C"
+        else:
+            return "no signal yet"
+
+    def read(self):
+        """Make a new simulated reading."""
+        rng = self.rng
+        rh = self.humidity
+        if rh is None:
+            rh = self.mean_humidity
+        t = self.temperature
+        if t is None:
+            t = self.mean_temperature
+        rh += 0.01 * (self.mean_humidity - rh) + rng.gauss(0, 0.2)
+        t += 0.01 * (self.mean_temperature - t) + rng.gauss(0, 0.05)
+        self.humidity = min(max(rh, 0.0), 100.0)
+        self.temperature = t
+        self.timestamp = time.time()
+        self.read_count += 1
+
+    @run_in_thread
+    def read_in_background_thread(self):
+        """Make new readings every ``period`` seconds."""
+        time_to_read = time.time()
+        while self.run_permitted:
+            if time.time() >= time_to_read:
+                time_to_read += self.period
+                self.read()
+            time.sleep(LOOP_SLEEP)
+
+    @property
+    def ready(self):
+        """Has a value been read for both humidity and temperature?"""
+        return None not in (self.humidity, self.temperature)
+
+    def terminate_background_thread(self, *args, **kwargs):
+        """Signal the background thread to stop."""
+        logger.debug("terminate background thread")
+        self.run_permitted = False
@@ -0,0 +1,141 @@
+"""
+Readings of many IOCs in one SQLite database.
+
+.. autosummary::
+    ~ReadingStore
+
+One table holds the (time, RH, T) readings of all IOCs, keyed
+(and ordered on disk) by IOC prefix and time, so a query for one
+IOC over a time range reads only the rows it returns.  The
+database is in WAL mode, so queries can run while new readings
+are written.  A reading already in the store (same prefix and
+time) is not added again, so the same data may be loaded twice.
+"""
+
+__all__ = "ReadingStore".split()
+
+import numpy as np
+import sqlite3
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS readings (
+        prefix TEXT NOT NULL,
+        time REAL NOT NULL,
+        humidity REAL,
+        temperature REAL,
+        PRIMARY KEY (prefix, time)
+    ) WITHOUT ROWID;
+"""
+INSERT = "INSERT OR IGNORE INTO readings VALUES (?, ?, ?, ?)"
+
+
+class ReadingStore:
+    """
+    SQLite database of (time, RH, T) readings, by IOC prefix.
+
+    PARAMETERS
+
+    path
+        *str* :
+        Database file (created if needed).
+    timeout
+        *float* :
+        Wait this long (s) for another writer to finish.
+        (default: 10)
+
+    .. autosummary::
+        ~close
+        ~insert
+        ~prefixes
+        ~query
+        ~summary
+    """
+
+    def __init__(self, path, timeout=10.0):
+        """Constructor."""
+        self.path = path
+        self.connection = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database."""
+        self.connection.close()
+
+    def insert(self, prefix, rows, commit=True):
+        """
+        Add readings (already stored readings are skipped).
+
+        PARAMETERS
+
+        prefix
+            *str* :
+            EPICS IOC prefix.
+        rows
+            *iterable* :
+            (time, RH, T) rows.
+        commit
+            *bool* :
+            Commit the transaction now.  Otherwise the caller
+            commits (``store.connection.commit()``), so more
+            changes can be in the same transaction.
+            (default: ``True``)
+
+        :return: number of rows given
+        :rtype: int
+        """
+        rows = [(prefix, float(t), float(rh), float(c)) for t, rh, c in rows]
+        self.connection.executemany(INSERT, rows)
+        if commit:
+            self.connection.commit()
+        return len(rows)
+
+    def query(self, prefix, start=None, end=None):
+        """
+        Readings of one IOC in a time range.
+
+        PARAMETERS
+
+        prefix
+            *str* :
+            EPICS IOC prefix.
+        start
+            *float* :
+            First time (``time.time()``) to include.
+            (default: the first reading)
+        end
+            *float* :
+            Include readings before this time.
+            (default: after the last reading)
+
+        :return: (time, RH, T) rows, in time order
+        :rtype: numpy.ndarray
+        """
+        rows = self.connection.execute(
+            "SELECT time, humidity, temperature FROM readings"
+            " WHERE prefix = ? AND time >= ? AND time < ?"
+            " ORDER BY time",
+            (
+                prefix,
+                -np.inf if start is None else start,
+                np.inf if end is None else end,
+            ),
+        ).fetchall()
+        return np.array(rows, dtype=float).reshape(-1, 3)
+
+    def prefixes(self):
+        """Return the IOC prefixes with readings."""
+        rows = self.connection.execute(
+            "SELECT DISTINCT prefix FROM readings ORDER BY prefix"
+        )
+        return [row[0] for row in rows]
+
+    def summary(self):
+        """Return (prefix, count, first time, last time) of each IOC."""
+        return self.connection.execute(
+            "SELECT prefix, COUNT(*), MIN(time), MAX(time)"
+            " FROM readings GROUP BY prefix ORDER BY prefix"
+        ).fetchall()
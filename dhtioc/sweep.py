@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+"""
+Evaluate candidate smoothing and trend factors against logged data.
+
+.. autosummary::
+    ~evaluate
+    ~main
+    ~sweep
+
+Each candidate is a combination of ``SMOOTHING_FACTOR``,
+``TREND_SMOOTHING_FACTOR``, and a set of trend factors
+(see :mod:`dhtioc.trend_analysis`).  It is scored by:
+
+=============  =========================================================
+metric         meaning (smaller is better, except as noted)
+=============  =========================================================
+noise          std. dev. of the sample-to-sample change of the smoothed
+               logged signal
+lag            samples for the smoothed response to a unit step to
+               reach 50%
+rise           samples for that response to go from 10% to 90%
+trend_noise    std. dev. of the sample-to-sample change of the logged
+               trend, relative to ``trend_gain``
+trend_gain     peak trend response to a unit step (larger is better)
+trend_delay    samples from a unit step to the peak of the trend
+=============  =========================================================
+
+The candidates are ranked by the sum of their ranks in *noise*, *lag*,
+*trend_noise*, and *trend_delay*.  A candidate without a trend
+response (*trend_gain* 0), or whose smoothed response never reaches
+the step, is invalid and ranked last.  The grid is evaluated in
+parallel, by a pool of processes.
+
+EXAMPLE::
+
+    dhtioc_sweep --start 2020-01-01 --end 2020-12-31 \\
+        --smoothing 0.5 0.6 0.72 0.8 0.9 \\
+        --trend-smoothing 0.8 0.9 0.95 0.98
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import datetime
+import itertools
+import numpy as np
+import os
+
+from .trend_analysis import (
+    slope_weights,
+    smooth_series,
+    SMOOTHING_FACTOR,
+    TREND_FACTORS,
+    TREND_SMOOTHING_FACTOR,
+)
+
+METRICS = "noise lag rise trend_noise trend_gain trend_delay".split()
+RANKED = "noise lag trend_noise trend_delay".split()
+STEP_LENGTH = 1000  # samples after the synthetic unit step
+
+_readings = None  # logged readings, set in each worker process
+
+
+def _init_worker(readings):
+    """Share the logged readings with the worker process."""
+    global _readings
+    _readings = readings
+
+
+def _raw_slope(readings, factors):
+    """Unsmoothed trend series, without keeping the per-factor cache."""
+    raw = np.zeros(len(readings))
+    for factor, weight in zip(factors, slope_weights(factors)):
+        raw += weight * smooth_series(readings, factor)
+    return raw
+
+
+def _samples_to(series, level):
+    """Index of the first sample at or above ``level`` (or the length)."""
+    reached = series >= level
+    if not reached.any():
+        return len(series)
+    return int(np.argmax(reached))
+
+
+def evaluate(candidate, readings=None):
+    """
+    Score one candidate.
+
+    PARAMETERS
+
+    candidate
+        *tuple* :
+        (smoothing, trend_smoothing, factors)
+    readings
+        *[float]* :
+        Logged readings.
+        (default: those shared with the worker process)
+
+    :return: candidate, its metrics, and if it is ``valid``
+    :rtype: dict
+    """
+    smoothing, trend_smoothing, factors = candidate
+    if readings is None:
+        readings = _readings
+
+    # response to a unit step
+    step = np.ones(STEP_LENGTH + 1)
+    step[0] = 0
+    response = smooth_series(step, smoothing)
+    trend = smooth_series(_raw_slope(step, factors), trend_smoothing)
+    gain = float(np.max(np.abs(trend)))
+    t90 = _samples_to(response, 0.9)
+    reached = t90 < len(response)
+    valid = gain > 0 and reached
+
+    # response to the logged signal
+    smoothed = smooth_series(readings, smoothing)
+    logged_trend = smooth_series(
+        _raw_slope(readings, factors), trend_smoothing
+    )
+
+    if gain > 0:
+        trend_noise = float(np.std(np.diff(logged_trend))) / gain
+        trend_delay = int(np.argmax(np.abs(trend)))
+    else:  # no trend response, worst possible
+        trend_noise = np.inf
+        trend_delay = len(trend)
+
+    return dict(
+        smoothing=smoothing,
+        trend_smoothing=trend_smoothing,
+        factors=factors,
+        noise=float(np.std(np.diff(smoothed))),
+        lag=_samples_to(response, 0.5),
+        rise=t90 - _samples_to(response, 0.1) if reached else len(response),
+        trend_noise=trend_noise,
+        trend_gain=gain,
+        trend_delay=trend_delay,
+        valid=valid,
+    )
+
+
+def sweep(readings, smoothings, trend_smoothings, factor_sets, workers=None):
+    """
+    Score all combinations of the candidate factors.
+
+    PARAMETERS
+
+    readings
+        *[float]* :
+        Logged readings.
+    smoothings
+        *[float]* :
+        Candidates for ``SMOOTHING_FACTOR``.
+    trend_smoothings
+        *[float]* :
+        Candidates for ``TREND_SMOOTHING_FACTOR``.
+    factor_sets
+        *[[float]]* :
+        Candidate sets of trend factors.
+    workers
+        *int* :
+        Number of processes.
+        (default: number of CPUs)
+
+    :return: metrics of each candidate, best (and valid) first
+    :rtype: [dict]
+    """
+    readings = np.asarray(readings, dtype=float)
+    grid = list(
+        itertools.product(
+            smoothings, trend_smoothings, [tuple(f) for f in factor_sets]
+        )
+    )
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(readings,)
+    ) as pool:
+        results = list(pool.map(evaluate, grid))
+
+    for metric in RANKED:
+        order = np.argsort([r[metric] for r in results], kind="stable")
+        for rank, i in enumerate(order):
+            results[i]["score"] = results[i].get("score", 0) + rank
+    return sorted(results, key=lambda r: (not r["valid"], r["score"]))
+
+
+def _date(text):
+    return datetime.datetime.strptime(text, "%Y-%m-%d").date()
+
+
+def _factors(text):
+    return tuple(float(v) for v in text.split(","))
+
+
+def main():
+    """Entry point for command-line program."""
+    from .datalogger import DataLogger
+
+    parser = argparse.ArgumentParser(
+        description="Score smoothing and trend factors against logged data."
+    )
+    parser.add_argument(
+        "--start",
+        type=_date,
+        required=True,
+        help="first day of data, YYYY-MM-DD",
+    )
+    parser.add_argument(
+        "--end",
+        type=_date,
+        default=None,
+        help="last day of data, YYYY-MM-DD (default: start)",
+    )
+    parser.add_argument(
+        "--path", default=None, help="base directory of the data files"
+    )
+    parser.add_argument(
+        "--channel",
+        choices=("humidity", "temperature"),
+        default="humidity",
+        help="signal to evaluate",
+    )
+    parser.add_argument(
+        "--smoothing",
+        type=float,
+        nargs="+",
+        default=[SMOOTHING_FACTOR],
+        help="candidate SMOOTHING_FACTOR values",
+    )
+    parser.add_argument(
+        "--trend-smoothing",
+        type=float,
+        nargs="+",
+        default=[TREND_SMOOTHING_FACTOR],
+        help="candidate TREND_SMOOTHING_FACTOR values",
+    )
+    parser.add_argument(
+        "--factors",
+        type=_factors,
+        action="append",
+        help="candidate set of trend factors, comma-separated"
+        " (repeat for more sets)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes (default: all CPUs)",
+    )
+    parser.add_argument(
+        "--top", type=int, default=20, help="number of candidates to show"
+    )
+    args = parser.parse_args()
+
+    logger = DataLogger("sweep", path=args.path)
+    data = logger.load(args.start, args.end)
+    if len(data) < 2:
+        parser.error(f"not enough data in {logger.base_path}")
+    column = 1 if args.channel == "humidity" else 2
+    print(f"{len(data)} readings, {os.cpu_count()} CPUs")
+
+    results = sweep(
+        data[:, column],
+        args.smoothing,
+        args.trend_smoothing,
+        args.factors or [TREND_FACTORS],
+        workers=args.workers,
+    )
+    print(f"{'score':>5} {'smooth':>6} {'trend':>6}", end="")
+    print("".join(f" {m:>11}" for m in METRICS), " factors")
+    for r in results[: args.top]:
+        print(f"{r['score']:5d} {r['smoothing']:6.3f}", end="")
+        print(f" {r['trend_smoothing']:6.3f}", end="")
+        print("".join(f" {r[m]:11.4g}" for m in METRICS), end="")
+        print("  " + ",".join(f"{f:g}" for f in r["factors"]))
+
+
+if __name__ == "__main__":
+    main()
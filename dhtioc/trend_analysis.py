@@ -2,18 +2,69 @@
 Analyze signal for its recent trend.
 
 .. autosummary::
+    ~batch_trend
+    ~slope_weights
+    ~smooth_series
     ~Trend
+    ~TrendBank
 
 """
 
-__all__ = "SMOOTHING_FACTOR Trend TREND_SMOOTHING_FACTOR".split()
+__all__ = """
+    batch_trend
+    slope_weights
+    smooth_series
+    SMOOTHING_FACTOR
+    Trend
+    TREND_FACTORS
+    TREND_SMOOTHING_FACTOR
+    TrendBank
+    TrendSeries
+""".split()
+
+from collections import namedtuple
+import numpy as np
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
 
-from .StatsReg import StatsRegClass
 from .utils import smooth
 
 SMOOTHING_FACTOR = 0.72  # factor between 0 and 1, higher is smoother
 TREND_SMOOTHING_FACTOR = 0.95  # applied to the reported trend
+TREND_FACTORS = (0.2, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95)
 # pick smoothing factors: https://github.com/prjemian/dhtioc/issues/20#issuecomment-672074382
+BLOCK_GAIN = 1e100  # largest factor**-k in a block, far from overflow
+
+
+def slope_weights(factors):
+    """
+    Weights that give the slope of smoothed v. (1-smoothing factor).
+
+    The *x* values of the linear regression, ``1 - factor``, never
+    change.  The least-squares slope is then a fixed linear
+    combination of the smoothed values, *y*:
+
+    .. math::
+
+      b = \\sum_i w_i y_i, \\quad
+      w_i = (x_i - \\bar{x}) / \\sum_j (x_j - \\bar{x})^2
+
+    With fewer than two factors there is no slope, and the
+    weights are all zero.
+
+    :param [float] factors: smoothing factors
+    :return: :math:`w_i`, in the order of ``factors``
+    :rtype: [float]
+    """
+    if len(factors) < 2:
+        return [0.0] * len(factors)
+    x = [1 - factor for factor in factors]
+    mean = sum(x) / len(x)
+    sxx = sum((xi - mean) ** 2 for xi in x)
+    return [(xi - mean) / sxx for xi in x]
 
 
 class Trend:
@@ -23,40 +74,51 @@ class Trend:
     Apply smoothing with various factors, and take the slope
     of the smoothed signal v. the smoothing factor.
 
+    PARAMETERS
+
+    factors
+        *[float]* :
+        Smoothing factors.
+        (default: ``TREND_FACTORS``)
+
     .. autosummary::
         ~compute
         ~slope
     """
 
-    def __init__(self):
+    def __init__(self, factors=TREND_FACTORS):
         """Constructor."""
-        self.cache = {
-            k: None for k in [0.2, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95]
-        }
-        self.stats = StatsRegClass()
+        self.cache = {k: None for k in factors}
+        self.weights = dict(zip(factors, slope_weights(factors)))
         self.trend = None
+        self._raw_slope = None
         self._computed = False
 
     def compute(self, reading):
         """
         (Re)compute the trend.
 
-        Actually, reset the stats registers and load new values
+        Update the smoothed values and their (unsmoothed) slope.
         """
-        self.stats.Clear()
         self._computed = False
-        for factor in self.cache.keys():
-            self.cache[factor] = smooth(
-                reading, factor, self.cache[factor]
-            )
-            self.stats.Add(1 - factor, self.cache[factor])
+        raw = 0.0
+        for factor, weight in self.weights.items():
+            value = smooth(reading, factor, self.cache[factor])
+            self.cache[factor] = value
+            raw += weight * value
+        self._raw_slope = raw
 
     @property
     def slope(self):
         """Set the trend as the slope of smoothed v. (1-smoothing factor)."""
-        if not self._computed and self.stats.count > 1:
-            raw = self.stats.LinearRegression()[-1]
-            self.trend = smooth(raw, TREND_SMOOTHING_FACTOR, self.trend)
+        if (
+            not self._computed
+            and self._raw_slope is not None
+            and len(self.cache) > 1
+        ):
+            self.trend = smooth(
+                self._raw_slope, TREND_SMOOTHING_FACTOR, self.trend
+            )
             self._computed = True
         return self.trend
 
@@ -65,4 +127,186 @@ class Trend:
         if self.slope is None:
             return "no trend yet"
         else:
-            return "trend: {self.slope:.3f}"
+            return f"trend: {self.slope:.3f}"
+
+
+class TrendBank:
+    """
+    Compute the current trends of several channels at once.
+
+    Numerically identical to a separate :class:`Trend` for each
+    channel.  The smoothed values of all channels and factors are
+    held in one (channels x factors) array, updated in one
+    vectorized step.  Every call to :meth:`compute` provides a new
+    reading for all channels.
+
+    PARAMETERS
+
+    channels
+        *int* :
+        Number of signals.
+    factors
+        *[float]* :
+        Smoothing factors.
+        (default: ``TREND_FACTORS``)
+
+    .. autosummary::
+        ~compute
+        ~slope
+    """
+
+    def __init__(self, channels, factors=TREND_FACTORS):
+        """Constructor."""
+        self.factors = np.array(factors, dtype=float)
+        self._complement = 1 - self.factors
+        self.weights = np.array(slope_weights(factors))
+        self.cache = np.full((channels, len(factors)), np.nan)
+        self.trend = np.full(channels, np.nan)
+        self._raw_slope = None
+        self._computed = False
+
+    def compute(self, readings):
+        """
+        (Re)compute the trends.
+
+        PARAMETERS
+
+        readings
+            *[float]* :
+            New value of each channel.
+        """
+        readings = np.asarray(readings, dtype=float)[:, np.newaxis]
+        self._computed = False
+        if self._raw_slope is None:
+            cache = np.repeat(readings, len(self.factors), axis=1)
+        else:
+            cache = self.factors * self.cache
+            cache += self._complement * readings
+        self.cache = cache
+        # Accumulate in the same order as Trend.compute() so the
+        # result is identical, not just within rounding.
+        raw = np.zeros(len(cache))
+        for column, weight in zip(cache.T, self.weights):
+            raw += weight * column
+        self._raw_slope = raw
+
+    @property
+    def slope(self):
+        """Trend of each channel (array), NaN before the first reading."""
+        if (
+            not self._computed
+            and self._raw_slope is not None
+            and len(self.factors) > 1
+        ):
+            k = TREND_SMOOTHING_FACTOR
+            if np.isnan(self.trend[0]):
+                self.trend = self._raw_slope.copy()
+            else:
+                self.trend = k * self.trend + (1 - k) * self._raw_slope
+            self._computed = True
+        return self.trend
+
+
+TrendSeries = namedtuple("TrendSeries", "smoothed cache slope")
+
+
+def _recursive_filter(x, factor, previous):
+    """
+    ``y[n] = factor*y[n-1] + (1-factor)*x[n]``, in closed form.
+
+    Within a block of readings, with :math:`a` = ``factor``,
+
+    .. math::
+
+      y_n = a^n \\left(y_0 + (1-a) \\sum_{k=1}^{n} a^{-k} x_k\\right)
+
+    a cumulative sum.  Blocks are short enough that :math:`a^{-k}`
+    stays below ``BLOCK_GAIN``, and each starts from the last value
+    of the one before.
+
+    :param numpy.ndarray x: readings
+    :param float factor: smoothing factor
+    :param float previous: value before ``x[0]``
+    """
+    y = np.empty_like(x)
+    if factor <= 0:
+        y[:] = x
+        return y
+    if factor >= 1:
+        y[:] = previous
+        return y
+    block = max(1, int(np.log(BLOCK_GAIN) / -np.log(factor)))
+    powers = factor ** np.arange(1, min(block, len(x)) + 1)
+    for start in range(0, len(x), block):
+        chunk = x[start : start + block]
+        p = powers[: len(chunk)]
+        y[start : start + len(chunk)] = p * (
+            previous + (1 - factor) * np.cumsum(chunk / p)
+        )
+        previous = y[start + len(chunk) - 1]
+    return y
+
+
+def smooth_series(readings, factor):
+    """
+    Apply :func:`~dhtioc.utils.smooth` to a whole series of readings.
+
+    Identical to calling ``smooth()`` for each reading in turn.
+    Uses ``scipy.signal.lfilter`` (a recursive filter) when SciPy
+    is available, otherwise the same filter in closed form with
+    NumPy (identical within rounding).
+
+    :param [float] readings: the series
+    :param float factor: smoothing factor
+    :return: smoothed series
+    :rtype: numpy.ndarray
+    """
+    x = np.asarray(readings, dtype=float)
+    y = np.empty_like(x)
+    if len(x) == 0:
+        return y
+    y[0] = x[0]  # as smooth() does for the first reading
+    if lfilter is not None:
+        # y[n] = (1-factor)*x[n] + factor*y[n-1]
+        y[1:] = lfilter(
+            [1 - factor], [1, -factor], x[1:], zi=[factor * x[0]]
+        )[0]
+    else:
+        y[1:] = _recursive_filter(x[1:], factor, x[0])
+    return y
+
+
+def batch_trend(
+    readings,
+    factors=TREND_FACTORS,
+    smoothing=SMOOTHING_FACTOR,
+    trend_smoothing=TREND_SMOOTHING_FACTOR,
+):
+    """
+    Compute the smoothed values and trend for a whole series at once.
+
+    With the default arguments, the results are identical
+    to streaming the readings through :func:`~dhtioc.utils.smooth`
+    and :class:`Trend`, as the IOC does.
+
+    :param [float] readings: the series
+    :param [float] factors: trend smoothing factors
+    :param float smoothing: smoothing factor for the reported value
+    :param float trend_smoothing: smoothing factor for the trend
+    :return: ``smoothed`` series, ``cache`` (readings x factors)
+        array, and trend ``slope`` series
+    :rtype: TrendSeries
+    """
+    readings = np.asarray(readings, dtype=float)
+    cache = np.empty((len(readings), len(factors)))
+    raw = np.zeros(len(readings))
+    for i, (factor, weight) in enumerate(
+        zip(factors, slope_weights(factors))
+    ):
+        cache[:, i] = smooth_series(readings, factor)
+        raw += weight * cache[:, i]  # same order as Trend.compute()
+    return TrendSeries(
+        smooth_series(readings, smoothing),
+        cache,
+        smooth_series(raw, trend_smoothing),
+    )
@@ -19,6 +19,10 @@ import versioneer
 __entry_points__  = {
     'console_scripts': [
         'dhtioc = dhtioc.ioc:main',
+        'dhtioc_sweep = dhtioc.sweep:main',
+        'dhtioc_loadtest = dhtioc.loadtest:main',
+        'dhtioc_aggregator = dhtioc.aggregator:main',
+        'dhtioc_collect = dhtioc.collector:main',
         ],
     #'gui_scripts': [],
 }
@@ -0,0 +1,56 @@
+"""Tests of the statistics registers."""
+
+import numpy as np
+import pytest
+
+from dhtioc.StatsReg import StatsRegClass, WindowedRegression
+
+X = [1.0, 2.0, 3.0, 4.5]
+Y = [2.0, 2.5, 3.5, 5.0]
+
+
+def _each(z):
+    reg = StatsRegClass()
+    for x, y, zz in zip(X, Y, np.broadcast_to(z, len(X))):
+        reg.AddWeighted(x, y, zz)
+    return reg
+
+
+@pytest.mark.parametrize("z", [[0.5, 1.0, 2.0, 0.1], 0.5])
+def test_AddWeightedArrays(z):
+    reg = StatsRegClass()
+    reg.AddWeightedArrays(X, Y, z)
+    assert reg.to_array() == pytest.approx(_each(z).to_array())
+    assert reg.count == len(X)
+
+
+def test_AddArrays():
+    reg = StatsRegClass()
+    reg.AddArrays(X, Y)
+    assert reg.to_array() == pytest.approx(_each(1.0).to_array())
+
+
+def test_AddArrays_lengths():
+    reg = StatsRegClass()
+    with pytest.raises(ValueError):
+        reg.AddArrays(X, Y[:-1])
+    assert reg.to_array() == StatsRegClass().to_array()  # unchanged
+
+
+def test_AddWeightedArrays_lengths():
+    reg = StatsRegClass()
+    with pytest.raises(ValueError):
+        reg.AddWeightedArrays(X, Y[:-1], 1.0)
+    with pytest.raises(ValueError):
+        reg.AddWeightedArrays(X, Y, [1.0, 2.0])
+
+
+def test_WindowedRegression_too_few():
+    reg = WindowedRegression()
+    with pytest.raises(ValueError):
+        reg.Mean()
+    reg.Append(1.0, 2.0)
+    with pytest.raises(ValueError):
+        reg.LinearRegression()
+    reg.Append(2.0, 4.0)
+    assert reg.LinearRegression() == pytest.approx((0.0, 2.0))
@@ -0,0 +1,43 @@
+"""Tests of the data file collector."""
+
+import os
+
+from dhtioc.collector import Collector
+from dhtioc.store import ReadingStore
+
+HEADER = b"# IOC prefix: pi1:\n#\n# time  RH  T\n"
+
+
+def _append(fname, data):
+    os.makedirs(os.path.dirname(fname), exist_ok=True)
+    with open(fname, "ab") as f:
+        f.write(data)
+
+
+def test_incremental(tmp_path):
+    base = str(tmp_path / "pi1")
+    fname = os.path.join(base, "2020", "11", "2020-11-01.txt")
+    store = ReadingStore(str(tmp_path / "fleet.sqlite"))
+    collector = Collector(store)
+
+    _append(fname, HEADER + b"1.00 50.0 20.0\n2.00 51.0 20.1\n3.00 5")
+    assert collector.collect(base) == (1, 2)
+    assert collector.collect(base) == (0, 0)  # nothing new
+
+    _append(fname, b"2.0 20.2\n4.00 53.0 20.3\n")  # completes the line
+    assert collector.collect(base) == (1, 2)
+    assert store.query("pi1:")[:, 1].tolist() == [50.0, 51.0, 52.0, 53.0]
+    store.close()
+
+
+def test_duplicates(tmp_path):
+    store = ReadingStore(str(tmp_path / "fleet.sqlite"))
+    collector = Collector(store)
+    for copy in ("pi1", "pi1_copy"):
+        _append(
+            str(tmp_path / copy / "2020-11-01.txt"),
+            HEADER + b"1.00 50.0 20.0\n2.00 51.0 20.1\n",
+        )
+        collector.collect(str(tmp_path / copy))
+    assert [row[:2] for row in store.summary()] == [("pi1:", 2)]
+    store.close()
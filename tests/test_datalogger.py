@@ -0,0 +1,159 @@
+"""Tests of the data files."""
+
+import datetime
+import os
+import sqlite3
+import time
+import warnings
+
+import numpy as np
+import pytest
+
+from dhtioc.datalogger import (
+    DataLogger,
+    SQLiteDataLogger,
+    read_file,
+    recover_file,
+)
+
+RECORDS = b"1604188800.00 50.1 25.1\n1604188802.00 50.2 25.0\n"
+
+
+@pytest.fixture
+def data_file(tmp_path):
+    """Return (path, header) of a new data file, without records."""
+    logger = DataLogger("test:", path=str(tmp_path))
+    fname = logger.get_daily_file(datetime.datetime(2020, 11, 1))
+    logger.create_file(fname)
+    with open(fname, "rb") as f:
+        return fname, f.read()
+
+
+def _write(fname, data):
+    with open(fname, "wb") as f:
+        f.write(data)
+
+
+def _read(fname):
+    with open(fname, "rb") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize(
+    "damage",
+    [
+        b"1604188804.00 5",  # torn last line
+        b"\0" * 100,  # zero-filled
+        b"1604188804.00 50.3 2\0\0\0\n\0\0",  # torn, then zero-filled
+    ],
+)
+def test_recover_file(data_file, damage):
+    fname, header = data_file
+    _write(fname, header + RECORDS + damage)
+    assert recover_file(fname) == len(damage)
+    assert _read(fname) == header + RECORDS
+
+
+def test_recover_file_intact(data_file):
+    fname, header = data_file
+    _write(fname, header + RECORDS)
+    assert recover_file(fname) == 0
+    assert _read(fname) == header + RECORDS
+
+
+def test_recover_header_only(data_file):
+    fname, header = data_file
+    assert recover_file(fname) == 0
+    assert _read(fname) == header
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # not numpy's "no data" warning
+        assert read_file(fname).shape == (0, 3)
+
+
+def test_recover_damaged_header(data_file):
+    fname, header = data_file
+    _write(fname, header[:40] + b"\0" * 60)
+    assert recover_file(fname) == 100
+    with pytest.raises(FileNotFoundError):
+        _read(fname)
+
+
+def test_recover_latest(tmp_path):
+    logger = DataLogger("test:", path=str(tmp_path))
+    for day in (1, 2):
+        when = datetime.datetime(2020, 11, day)
+        logger.record(50.0, 20.0, when)
+    fname = logger.get_daily_file(datetime.datetime(2020, 11, 2))
+    before = _read(fname)
+    with open(fname, "ab") as f:
+        f.write(b"1604188804.00 5")
+    assert logger.recover() == len(b"1604188804.00 5")
+    assert _read(fname) == before
+    np.testing.assert_array_equal(read_file(fname)[:, 1:], [[50.0, 20.0]])
+
+
+def _locked(logger):
+    """Another connection that holds the write lock of the database."""
+    other = sqlite3.connect(logger.db_file)
+    other.execute("BEGIN IMMEDIATE")
+    return other
+
+
+def test_sqlite_retry(tmp_path):
+    logger = SQLiteDataLogger(
+        "test:", path=str(tmp_path), batch_size=3, max_pending=5
+    )
+    other = _locked(logger)
+    t0 = datetime.datetime(2020, 11, 1)
+    for i in range(8):
+        started = time.monotonic()
+        logger.record(50.0 + i, 20.0, t0 + datetime.timedelta(seconds=2 * i))
+        assert time.monotonic() - started < 1  # not the store's 10 s
+    assert logger.pending == 7  # the oldest record was dropped
+    other.rollback()
+    logger.record(58.0, 20.0, t0 + datetime.timedelta(seconds=16))
+    assert logger.pending == 0
+    rows = logger.load(t0.date())
+    np.testing.assert_array_equal(rows[:, 1], 51.0 + np.arange(8))
+    logger.close()
+    other.close()
+
+
+def test_sqlite_open_locked(tmp_path):
+    SQLiteDataLogger("test:", path=str(tmp_path)).close()
+    logger = SQLiteDataLogger("test:", path=str(tmp_path))
+    other = _locked(logger)
+    SQLiteDataLogger("other:", path=str(tmp_path)).close()
+    other.close()
+    logger.close()
+
+
+def test_read_file_damaged(data_file, caplog):
+    fname, header = data_file
+    _write(fname, header + RECORDS + b"garbage\n\0\0\0\n" + RECORDS)
+    rows = read_file(fname)
+    assert rows[:, 1].tolist() == [50.1, 50.2, 50.1, 50.2]
+    assert "skipped 2 damaged lines" in caplog.text
+
+
+def test_read_file_incomplete(data_file):
+    fname, header = data_file
+    _write(fname, header + RECORDS + b"1604188804.00 50")
+    assert read_file(fname)[:, 1].tolist() == [50.1, 50.2]
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_load(tmp_path, workers):
+    logger = DataLogger("test:", path=str(tmp_path))
+    days = [datetime.datetime(2020, 11, day, 12) for day in range(1, 8)]
+    for i, when in enumerate(days):
+        logger.record(40.0 + i, 20.0, when)
+    # a damaged line, and a day without a file
+    with open(logger.get_daily_file(days[2]), "ab") as f:
+        f.write(b"\0\0\0\n")
+    os.remove(logger.get_daily_file(days[4]))
+    rows = logger.load(days[0].date(), days[-1].date(), workers=workers)
+    assert rows[:, 1].tolist() == [40.0, 41.0, 42.0, 43.0, 45.0, 46.0]
+    assert rows[:, 0].tolist() == [
+        round(day.timestamp(), 2) for day in days if day != days[4]
+    ]
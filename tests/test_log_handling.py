@@ -0,0 +1,33 @@
+"""Tests of the log rate limit."""
+
+import logging
+
+from dhtioc.log_handling import RateLimitFilter
+
+
+def _record(level, msg, *args):
+    return logging.LogRecord(
+        "dhtioc.test", level, __file__, 1, msg, args, None
+    )
+
+
+def test_repeats_dropped():
+    limit = RateLimitFilter()
+    message = "no new sensor reading in %.1f s"
+    assert limit.filter(_record(logging.WARNING, message, 30.0))
+    assert not limit.filter(_record(logging.WARNING, message, 32.0))
+
+
+def test_other_files_pass():
+    limit = RateLimitFilter()
+    message = "removed damaged data file %s"
+    assert limit.filter(_record(logging.WARNING, message, "a.txt"))
+    assert limit.filter(_record(logging.WARNING, message, "b.txt"))
+    assert not limit.filter(_record(logging.WARNING, message, "a.txt"))
+
+
+def test_info_passes():
+    limit = RateLimitFilter()
+    message = "%s: %d readings from %d files"
+    for path in ("/data/pi1", "/data/pi2", "/data/pi1"):
+        assert limit.filter(_record(logging.INFO, message, path, 10, 1))
@@ -0,0 +1,26 @@
+"""Tests of the derived quantities."""
+
+import warnings
+
+import numpy as np
+
+from dhtioc.psychrometrics import derive, dew_point, in_domain
+
+
+def test_dry_air():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")  # no divide by zero
+        values = derive(0.0, 20.0)
+    assert np.isfinite(values.dew_point)
+    assert values.dew_point < dew_point(1.0, 20.0)
+    assert not in_domain(0.0, 20.0)
+
+
+def test_in_domain():
+    assert list(in_domain([0, 0.1, 50, 100, 101], 20.0)) == [
+        False,
+        True,
+        True,
+        True,
+        False,
+    ]
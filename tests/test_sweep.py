@@ -0,0 +1,27 @@
+"""Tests of the factor sweep."""
+
+import numpy as np
+
+from dhtioc.sweep import evaluate
+
+READINGS = 50 + np.cumsum(np.random.default_rng(42).normal(0, 0.3, 1000))
+
+
+def test_evaluate():
+    result = evaluate((0.72, 0.95, (0.2, 0.5, 0.9)), READINGS)
+    assert result["valid"]
+    assert 0 < result["lag"] < result["rise"] + result["lag"] < 100
+    assert np.isfinite(result["trend_noise"])
+
+
+def test_never_reaches_step():
+    result = evaluate((1.0, 0.95, (0.2, 0.5, 0.9)), READINGS)
+    assert not result["valid"]
+    assert result["lag"] == result["rise"] > 1000
+
+
+def test_no_trend():
+    result = evaluate((0.72, 0.95, (0.5,)), READINGS)  # one factor
+    assert not result["valid"]
+    assert result["trend_gain"] == 0
+    assert result["trend_noise"] == np.inf
@@ -0,0 +1,88 @@
+"""Tests of the trend analysis."""
+
+import numpy as np
+import pytest
+
+from dhtioc import trend_analysis
+from dhtioc.trend_analysis import (
+    SMOOTHING_FACTOR,
+    Trend,
+    TrendBank,
+    batch_trend,
+    smooth_series,
+)
+from dhtioc.utils import smooth
+
+READINGS = 50 + np.cumsum(np.random.default_rng(42).normal(0, 0.3, 500))
+
+
+def _streamed(readings, factor):
+    values = []
+    value = None
+    for reading in readings:
+        value = smooth(reading, factor, value)
+        values.append(value)
+    return np.array(values)
+
+
+@pytest.fixture(params=["lfilter", "closed form"])
+def method(request, monkeypatch):
+    """smooth_series() with SciPy, and with the NumPy fallback."""
+    if request.param == "lfilter":
+        pytest.importorskip("scipy.signal")
+    else:
+        monkeypatch.setattr(trend_analysis, "lfilter", None)
+    return request.param
+
+
+def test_str():
+    trend = Trend()
+    assert str(trend) == "no trend yet"
+    for reading in READINGS[:10]:
+        trend.compute(reading)
+    assert str(trend) == f"trend: {trend.slope:.3f}"
+
+
+def test_TrendBank():
+    readings = np.array([READINGS, READINGS[::-1]]).T
+    trends = [Trend(), Trend()]
+    bank = TrendBank(2)
+    assert np.isnan(bank.slope).all()
+    for row in readings:
+        bank.compute(row)
+        for trend, reading in zip(trends, row):
+            trend.compute(reading)
+        assert list(bank.slope) == [trend.slope for trend in trends]
+
+
+@pytest.mark.parametrize("factor", [0.0, 0.2, SMOOTHING_FACTOR, 0.95, 1.0])
+def test_smooth_series(method, factor):
+    expected = _streamed(READINGS, factor)
+    assert smooth_series(READINGS, factor) == pytest.approx(
+        expected, rel=1e-12
+    )
+
+
+def test_smooth_series_long(method):
+    # many blocks of the closed form
+    readings = np.tile(READINGS, 200)
+    expected = _streamed(readings, 0.2)
+    assert smooth_series(readings, 0.2) == pytest.approx(expected, rel=1e-12)
+
+
+def test_smooth_series_empty(method):
+    assert len(smooth_series([], 0.5)) == 0
+
+
+def test_batch_trend(method):
+    smoothed, cache, slope = batch_trend(READINGS)
+    trend = Trend()
+    for i, reading in enumerate(READINGS):
+        trend.compute(reading)
+        assert cache[i] == pytest.approx(
+            [trend.cache[k] for k in trend.weights], rel=1e-12
+        )
+        assert slope[i] == pytest.approx(trend.slope, rel=1e-9, abs=1e-12)
+    assert smoothed == pytest.approx(
+        _streamed(READINGS, SMOOTHING_FACTOR), rel=1e-12
+    )